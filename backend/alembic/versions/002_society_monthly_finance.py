@@ -0,0 +1,53 @@
+"""society monthly finance rollup
+
+Revision ID: 002_society_monthly_finance
+Revises: 001_initial
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '002_society_monthly_finance'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('society_monthly_finance',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('society_id', sa.Integer(), sa.ForeignKey('societies.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('collected', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('pending', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('overdue', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('late_fee', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('pending_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('overdue_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('society_id', 'year', 'month', name='uq_society_monthly_finance_period'),
+    )
+
+    # Backfill from existing invoices and payments
+    op.execute("""
+        INSERT INTO society_monthly_finance
+            (society_id, year, month, collected, pending, overdue, late_fee, pending_count, overdue_count)
+        SELECT i.society_id, i.year, i.month,
+               COALESCE(SUM(p.paid), 0),
+               COALESCE(SUM(CASE WHEN i.status = 'pending' THEN i.total_amount END), 0),
+               COALESCE(SUM(CASE WHEN i.status = 'overdue' THEN i.total_amount END), 0),
+               COALESCE(SUM(i.late_fee), 0),
+               COUNT(CASE WHEN i.status = 'pending' THEN i.id END),
+               COUNT(CASE WHEN i.status = 'overdue' THEN i.id END)
+        FROM maintenance_invoices i
+        LEFT JOIN (
+            SELECT invoice_id, SUM(amount) AS paid FROM payments GROUP BY invoice_id
+        ) p ON p.invoice_id = i.id
+        GROUP BY i.society_id, i.year, i.month
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('society_monthly_finance')
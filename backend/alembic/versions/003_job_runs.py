@@ -0,0 +1,26 @@
+"""job runs
+
+Revision ID: 003_job_runs
+Revises: 002_society_monthly_finance
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003_job_runs'
+down_revision: Union[str, None] = '002_society_monthly_finance'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('job_runs',
+        sa.Column('name', sa.String(100), primary_key=True),
+        sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_affected', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_runs')
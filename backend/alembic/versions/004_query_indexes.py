@@ -0,0 +1,72 @@
+"""composite indexes for router query shapes
+
+Revision ID: 004_query_indexes
+Revises: 003_job_runs
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '004_query_indexes'
+down_revision: Union[str, None] = '003_job_runs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_INVOICE = sa.text("status IN ('pending', 'overdue')")
+PENDING_INVOICE = sa.text("status = 'pending'")
+ACTIVE_VISITOR = sa.text("status IN ('pending', 'approved')")
+
+
+def upgrade() -> None:
+    # Maintenance invoices
+    op.create_index('ix_invoices_society_status', 'maintenance_invoices', ['society_id', 'status'])
+    op.create_index('ix_invoices_society_period', 'maintenance_invoices', ['society_id', 'year', 'month'])
+    op.create_index('ix_invoices_society_created', 'maintenance_invoices', ['society_id', 'created_at'])
+    op.create_index('ix_invoices_flat_created', 'maintenance_invoices', ['flat_id', 'created_at'])
+    op.create_index('ix_invoices_society_open', 'maintenance_invoices', ['society_id', 'year', 'month'],
+                    postgresql_where=OPEN_INVOICE, sqlite_where=OPEN_INVOICE)
+    op.create_index('ix_invoices_pending_due', 'maintenance_invoices', ['due_date'],
+                    postgresql_where=PENDING_INVOICE, sqlite_where=PENDING_INVOICE)
+
+    # Payments
+    op.create_index('ix_payments_invoice', 'payments', ['invoice_id'])
+    op.create_index('ix_payments_user_date', 'payments', ['user_id', 'payment_date'])
+
+    # Complaints
+    op.create_index('ix_complaints_society_created', 'complaints', ['society_id', 'created_at'])
+    op.create_index('ix_complaints_user_created', 'complaints', ['user_id', 'created_at'])
+
+    # Visitors
+    op.create_index('ix_visitors_society_created', 'visitors', ['society_id', 'created_at'])
+    op.create_index('ix_visitors_flat_created', 'visitors', ['flat_id', 'created_at'])
+    op.create_index('ix_visitors_society_active', 'visitors', ['society_id'],
+                    postgresql_where=ACTIVE_VISITOR, sqlite_where=ACTIVE_VISITOR)
+
+    # Notices, bookings, polls, votes, users
+    op.create_index('ix_notices_society_created', 'notices', ['society_id', 'created_at'])
+    op.create_index('ix_bookings_society_facility_date', 'bookings', ['society_id', 'facility_name', 'booking_date'])
+    op.create_index('ix_polls_society_created', 'polls', ['society_id', 'created_at'])
+    op.create_index('ix_votes_poll_user', 'votes', ['poll_id', 'user_id'])
+    op.create_index('ix_users_society_role', 'users', ['society_id', 'role'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_society_role', table_name='users')
+    op.drop_index('ix_votes_poll_user', table_name='votes')
+    op.drop_index('ix_polls_society_created', table_name='polls')
+    op.drop_index('ix_bookings_society_facility_date', table_name='bookings')
+    op.drop_index('ix_notices_society_created', table_name='notices')
+    op.drop_index('ix_visitors_society_active', table_name='visitors')
+    op.drop_index('ix_visitors_flat_created', table_name='visitors')
+    op.drop_index('ix_visitors_society_created', table_name='visitors')
+    op.drop_index('ix_complaints_user_created', table_name='complaints')
+    op.drop_index('ix_complaints_society_created', table_name='complaints')
+    op.drop_index('ix_payments_user_date', table_name='payments')
+    op.drop_index('ix_payments_invoice', table_name='payments')
+    op.drop_index('ix_invoices_pending_due', table_name='maintenance_invoices')
+    op.drop_index('ix_invoices_society_open', table_name='maintenance_invoices')
+    op.drop_index('ix_invoices_flat_created', table_name='maintenance_invoices')
+    op.drop_index('ix_invoices_society_created', table_name='maintenance_invoices')
+    op.drop_index('ix_invoices_society_period', table_name='maintenance_invoices')
+    op.drop_index('ix_invoices_society_status', table_name='maintenance_invoices')
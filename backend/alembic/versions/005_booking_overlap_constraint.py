@@ -0,0 +1,60 @@
+"""booking overlap constraint
+
+Revision ID: 005_booking_overlap_constraint
+Revises: 004_query_indexes
+Create Date: 2026-10-18
+
+Cancel or fix any overlapping confirmed bookings before upgrading, or the
+constraint cannot be created.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '005_booking_overlap_constraint'
+down_revision: Union[str, None] = '004_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_OVERLAP_CHECK = """
+    WHEN NEW.status = 'confirmed' AND EXISTS (
+        SELECT 1 FROM bookings b
+        WHERE b.id IS NOT NEW.id
+          AND b.society_id = NEW.society_id
+          AND b.facility_name = NEW.facility_name
+          AND b.booking_date = NEW.booking_date
+          AND b.status = 'confirmed'
+          AND b.start_time < NEW.end_time
+          AND b.end_time > NEW.start_time
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'bookings_no_overlap');
+    END
+"""
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute("""
+            ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap EXCLUDE USING gist (
+                society_id WITH =,
+                facility_name WITH =,
+                tsrange(booking_date + start_time, booking_date + end_time, '[)') WITH &&
+            ) WHERE (status = 'confirmed')
+        """)
+    elif dialect == 'sqlite':
+        op.execute("CREATE TRIGGER bookings_no_overlap_insert BEFORE INSERT ON bookings" + SQLITE_OVERLAP_CHECK)
+        op.execute(
+            "CREATE TRIGGER bookings_no_overlap_update BEFORE UPDATE OF "
+            "status, booking_date, start_time, end_time, facility_name ON bookings" + SQLITE_OVERLAP_CHECK
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_no_overlap")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS bookings_no_overlap_update")
+        op.execute("DROP TRIGGER IF EXISTS bookings_no_overlap_insert")
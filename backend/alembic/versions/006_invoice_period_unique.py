@@ -0,0 +1,26 @@
+"""one invoice per flat and billing month
+
+Revision ID: 006_invoice_period_unique
+Revises: 005_booking_overlap_constraint
+Create Date: 2026-10-18
+
+Merge or delete duplicate (flat_id, year, month) invoices before upgrading,
+or the index cannot be created.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '006_invoice_period_unique'
+down_revision: Union[str, None] = '005_booking_overlap_constraint'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'uq_invoices_flat_period', 'maintenance_invoices', ['flat_id', 'year', 'month'], unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_invoices_flat_period', table_name='maintenance_invoices')
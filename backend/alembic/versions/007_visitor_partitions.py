@@ -0,0 +1,127 @@
+"""monthly visitor partitions and visitor archive
+
+Revision ID: 007_visitor_partitions
+Revises: 006_invoice_period_unique
+Create Date: 2026-10-18
+
+On PostgreSQL, visitors becomes a table partitioned by month on created_at,
+with a partition for every month that has rows, the next few months, and a
+default partition for anything outside them. The rows are copied, so run it
+in a maintenance window on large tables. The primary key becomes
+(id, created_at), since a partitioned table's keys must include the
+partition key. SQLite keeps the plain table.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007_visitor_partitions'
+down_revision: Union[str, None] = '006_invoice_period_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+ACTIVE_VISITOR = sa.text("status IN ('pending', 'approved')")
+COLUMNS = (
+    "id, society_id, flat_id, visitor_name, visitor_phone, purpose, vehicle_number, "
+    "entry_time, exit_time, status, approved_by, created_at"
+)
+VISITORS_TABLE = """
+    CREATE TABLE visitors (
+        id INTEGER NOT NULL DEFAULT nextval('visitors_id_seq'),
+        society_id INTEGER NOT NULL REFERENCES societies (id),
+        flat_id INTEGER NOT NULL REFERENCES flats (id),
+        visitor_name VARCHAR(255) NOT NULL,
+        visitor_phone VARCHAR(20),
+        purpose VARCHAR(255),
+        vehicle_number VARCHAR(20),
+        entry_time TIMESTAMP WITH TIME ZONE DEFAULT now(),
+        exit_time TIMESTAMP WITH TIME ZONE,
+        status VARCHAR(20),
+        approved_by INTEGER REFERENCES users (id),
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+        {key}
+    ){partitioning}
+"""
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_visitors_society_created', 'visitors', ['society_id', 'created_at'])
+    op.create_index('ix_visitors_flat_created', 'visitors', ['flat_id', 'created_at'])
+    op.create_index('ix_visitors_society_active', 'visitors', ['society_id'],
+                    postgresql_where=ACTIVE_VISITOR)
+
+
+def _drop_indexes() -> None:
+    for name in ('ix_visitors_society_active', 'ix_visitors_flat_created', 'ix_visitors_society_created'):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _partition_visitors() -> None:
+    bind = op.get_bind()
+    op.execute("UPDATE visitors SET created_at = COALESCE(entry_time, now()) WHERE created_at IS NULL")
+    _drop_indexes()
+    op.execute("ALTER TABLE visitors RENAME TO visitors_unpartitioned")
+    op.execute("ALTER TABLE visitors_unpartitioned RENAME CONSTRAINT visitors_pkey TO visitors_unpartitioned_pkey")
+    op.execute(VISITORS_TABLE.format(key="PRIMARY KEY (id, created_at)", partitioning=" PARTITION BY RANGE (created_at)"))
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM visitors_unpartitioned")).scalar()
+    now = datetime.now(timezone.utc)
+    oldest = oldest.astimezone(timezone.utc) if oldest else now
+    month = date(oldest.year, oldest.month, 1)
+    last = date(now.year, now.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        following = _next_month(month)
+        op.execute(
+            f"CREATE TABLE visitors_{month:%Y_%m} PARTITION OF visitors "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{following} 00:00:00+00')"
+        )
+        month = following
+    op.execute("CREATE TABLE visitors_default PARTITION OF visitors DEFAULT")
+
+    op.execute(f"INSERT INTO visitors ({COLUMNS}) SELECT {COLUMNS} FROM visitors_unpartitioned")
+    op.execute("ALTER SEQUENCE visitors_id_seq OWNED BY visitors.id")
+    op.execute("DROP TABLE visitors_unpartitioned")
+    _create_indexes()
+
+
+def _unpartition_visitors() -> None:
+    _drop_indexes()
+    op.execute("ALTER TABLE visitors RENAME TO visitors_partitioned")
+    op.execute("ALTER TABLE visitors_partitioned RENAME CONSTRAINT visitors_pkey TO visitors_partitioned_pkey")
+    op.execute(VISITORS_TABLE.format(key="PRIMARY KEY (id)", partitioning=""))
+    op.execute(f"INSERT INTO visitors ({COLUMNS}) SELECT {COLUMNS} FROM visitors_partitioned")
+    op.execute("ALTER SEQUENCE visitors_id_seq OWNED BY visitors.id")
+    op.execute("DROP TABLE visitors_partitioned CASCADE")
+    _create_indexes()
+
+
+def upgrade() -> None:
+    op.create_table('visitor_archive',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('society_id', sa.Integer(), sa.ForeignKey('societies.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_visitor_archive_society_period', 'visitor_archive', ['society_id', 'year', 'month'])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        _partition_visitors()
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _unpartition_visitors()
+
+    op.drop_index('ix_visitor_archive_society_period', table_name='visitor_archive')
+    op.drop_table('visitor_archive')
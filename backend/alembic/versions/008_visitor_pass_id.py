@@ -0,0 +1,22 @@
+"""visitor pass id
+
+Revision ID: 008_visitor_pass_id
+Revises: 007_visitor_partitions
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '008_visitor_pass_id'
+down_revision: Union[str, None] = '007_visitor_partitions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('visitors', sa.Column('pass_id', sa.String(32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('visitors', 'pass_id')
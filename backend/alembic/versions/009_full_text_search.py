@@ -0,0 +1,58 @@
+"""full-text search on complaints and notices
+
+Revision ID: 009_full_text_search
+Revises: 008_visitor_pass_id
+Create Date: 2026-10-18
+
+PostgreSQL gets a generated, weighted search_vector column with a GIN index
+on each table; adding it rewrites the table. SQLite gets FTS5 tables kept in
+sync by triggers.
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '009_full_text_search'
+down_revision: Union[str, None] = '008_visitor_pass_id'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (title column weight A, body column weight B)
+SEARCHABLE = {'complaints': ('title', 'description'), 'notices': ('title', 'content')}
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table, (title, body) in SEARCHABLE.items():
+        if dialect == 'postgresql':
+            op.execute(f"""
+                ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english'::regconfig, coalesce({title}, '')), 'A') ||
+                    setweight(to_tsvector('english'::regconfig, coalesce({body}, '')), 'B')
+                ) STORED
+            """)
+            op.execute(f"CREATE INDEX ix_{table}_search ON {table} USING gin (search_vector)")
+        elif dialect == 'sqlite':
+            fts = f"{table}_fts"
+            remove = f"INSERT INTO {fts}({fts}, rowid, {title}, {body}) VALUES ('delete', old.id, old.{title}, old.{body});"
+            add = f"INSERT INTO {fts}(rowid, {title}, {body}) VALUES (new.id, new.{title}, new.{body});"
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({title}, {body}, content='{table}', content_rowid='id', "
+                f"tokenize='porter unicode61')"
+            )
+            op.execute(f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN {add} END")
+            op.execute(f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN {remove} END")
+            op.execute(f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {title}, {body} ON {table} BEGIN {remove} {add} END")
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table in SEARCHABLE:
+        if dialect == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+        elif dialect == 'sqlite':
+            fts = f"{table}_fts"
+            for action in ('update', 'delete', 'insert'):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{action}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
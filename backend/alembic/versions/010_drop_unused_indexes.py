@@ -0,0 +1,28 @@
+"""drop unused open-invoice index
+
+Revision ID: 010_drop_unused_indexes
+Revises: 009_full_text_search
+Create Date: 2026-10-18
+
+Open dues are read from society_monthly_finance since 002, so no query uses
+ix_invoices_society_open any more; it only slows invoice writes.
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010_drop_unused_indexes'
+down_revision: Union[str, None] = '009_full_text_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_INVOICE = sa.text("status IN ('pending', 'overdue')")
+
+
+def upgrade() -> None:
+    op.drop_index('ix_invoices_society_open', table_name='maintenance_invoices')
+
+
+def downgrade() -> None:
+    op.create_index('ix_invoices_society_open', 'maintenance_invoices', ['society_id', 'year', 'month'],
+                    postgresql_where=OPEN_INVOICE, sqlite_where=OPEN_INVOICE)
@@ -1,17 +1,70 @@
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.cache import TTLCache
+from app.config import get_settings
+from app.database import SessionLocal, get_db
 from app.auth.jwt import verify_token
 from app.models.user import User
 
+settings = get_settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """The subset of a user that authorization and scoping need."""
+    id: int
+    role: str
+    society_id: int | None
+    flat_id: int | None
+    is_active: bool
+
+
+# Keyed by user id. Write paths that change these fields must call
+# invalidate_user(); other workers pick the change up within the TTL.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl_seconds=settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int):
+    user_cache.pop(user_id)
+
+
+def load_current_user(db: Session, user_id: int) -> CurrentUser | None:
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    row = db.query(User.id, User.role, User.society_id, User.flat_id, User.is_active).filter(
+        User.id == user_id
+    ).first()
+    if row is None:
+        return None
+    current = CurrentUser(
+        id=row.id, role=row.role, society_id=row.society_id, flat_id=row.flat_id, is_active=bool(row.is_active)
+    )
+    user_cache.set(user_id, current)
+    return current
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
-) -> User:
+) -> CurrentUser:
+    return _user_from_token(token, db)
+
+
+def authenticate_token(token: str | None) -> CurrentUser:
+    """``get_current_user`` for long-lived connections (event streams).
+
+    Uses its own short session, so the connection does not keep one checked
+    out of the pool for its whole lifetime.
+    """
+    with SessionLocal() as db:
+        return _user_from_token(token, db)
+
+
+def _user_from_token(token: str | None, db: Session) -> CurrentUser:
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,7 +81,7 @@ def get_current_user(
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = load_current_user(db, int(user_id))
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
     return user
@@ -36,7 +89,7 @@ def get_current_user(
 
 def require_role(*roles: str):
     """Dependency factory that checks for specific roles."""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
         if current_user.role not in roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
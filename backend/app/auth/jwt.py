@@ -1,9 +1,16 @@
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
+from app.cache import TTLCache
 from app.config import get_settings
 
 settings = get_settings()
 
+# Decoded payloads of tokens that passed signature and expiry checks, keyed
+# by SHA-256 of the token. An entry never outlives the token's own ``exp``.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS)
+
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
@@ -12,9 +19,30 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
 
+def user_claims(user) -> dict:
+    """Claims issued for a user: subject plus the fields used for scoping."""
+    return {
+        "sub": str(user.id),
+        "role": user.role,
+        "society_id": user.society_id,
+        "flat_id": user.flat_id,
+    }
+
+
 def verify_token(token: str) -> dict | None:
+    """Return the token's payload, or None if invalid. Callers must not mutate it."""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            return payload
+        token_cache.pop(key)
+        return None
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except JWTError:
         return None
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(key, payload, ttl_seconds=min(settings.TOKEN_CACHE_TTL_SECONDS, exp - time.time()))
+    return payload
@@ -1,14 +1,88 @@
+import asyncio
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
 import httpx
+from jose import JWTError, jwt
 from app.config import get_settings
 
 settings = get_settings()
 
-GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
-GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
-GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
+GOOGLE_DISCOVERY_PATH = "/.well-known/openid-configuration"
 
+# One client for the life of the app: keeps TLS connections to Google alive
+# between logins. Opened and closed by the FastAPI lifespan in app.main.
+_client: httpx.AsyncClient | None = None
 
-def get_google_auth_url() -> str:
+# {"discovery"/"jwks": (expires_at, document)}
+_documents: dict[str, tuple[float, dict]] = {}
+_document_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+async def open_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(settings.OAUTH_HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.OAUTH_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OAUTH_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _max_age(response: httpx.Response) -> int:
+    for directive in response.headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "max-age" and value.isdigit():
+            return int(value)
+    return settings.OAUTH_METADATA_CACHE_SECONDS
+
+
+def _is_fresh(name: str, stale: dict | None) -> bool:
+    cached = _documents.get(name)
+    return cached is not None and cached[1] is not stale and time.monotonic() < cached[0]
+
+
+async def _cached_document(name: str, url: str, stale: dict | None = None) -> dict:
+    """Return a cached document, refetching when expired or when it is ``stale``.
+
+    Each document has its own lock, and nothing else is awaited while one is
+    held, so fetching one document never waits on another.
+    """
+    if not _is_fresh(name, stale):
+        async with _document_locks[name]:
+            # Another request may have fetched it while we waited for the lock
+            if not _is_fresh(name, stale):
+                client = await open_http_client()
+                response = await client.get(url)
+                response.raise_for_status()
+                _documents[name] = (time.monotonic() + _max_age(response), response.json())
+    return _documents[name][1]
+
+
+async def get_google_discovery() -> dict:
+    return await _cached_document("discovery", settings.GOOGLE_ISSUER.rstrip("/") + GOOGLE_DISCOVERY_PATH)
+
+
+async def get_google_jwks(stale: dict | None = None) -> dict:
+    # Resolved before taking the JWKS lock; discovery may itself need a refetch
+    jwks_uri = (await get_google_discovery())["jwks_uri"]
+    return await _cached_document("jwks", jwks_uri, stale=stale)
+
+
+async def get_google_auth_url() -> str:
+    discovery = await get_google_discovery()
     params = {
         "client_id": settings.GOOGLE_CLIENT_ID,
         "redirect_uri": settings.GOOGLE_REDIRECT_URI,
@@ -16,33 +90,75 @@ def get_google_auth_url() -> str:
         "scope": "openid email profile",
         "access_type": "offline",
     }
-    query = "&".join(f"{k}={v}" for k, v in params.items())
-    return f"{GOOGLE_AUTH_URL}?{query}"
+    return f"{discovery['authorization_endpoint']}?{urlencode(params)}"
 
 
-async def exchange_google_code(code: str) -> dict:
-    """Exchange authorization code for tokens and user info."""
-    async with httpx.AsyncClient() as client:
-        # Exchange code for token
-        token_response = await client.post(
-            GOOGLE_TOKEN_URL,
-            data={
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": settings.GOOGLE_REDIRECT_URI,
-            },
+async def verify_google_id_token(id_token: str, access_token: str | None = None) -> dict | None:
+    """Verify an ID token against the cached JWKS; refetch once for an unknown key."""
+    discovery = await get_google_discovery()
+    issuer = discovery["issuer"]
+    try:
+        kid = jwt.get_unverified_header(id_token).get("kid")
+    except JWTError:
+        return None
+    jwks = await get_google_jwks()
+    if kid and not any(key.get("kid") == kid for key in jwks.get("keys", [])):
+        # Google rotates its signing keys; the cached set may be stale
+        jwks = await get_google_jwks(stale=jwks)
+    try:
+        claims = jwt.decode(
+            id_token,
+            jwks,
+            algorithms=["RS256"],
+            audience=settings.GOOGLE_CLIENT_ID,
+            access_token=access_token,
+            options={"verify_iss": False},
         )
-        tokens = token_response.json()
-        access_token = tokens.get("access_token")
+    except JWTError:
+        return None
+    # Google issues both the bare host and the https:// form
+    if claims.get("iss") not in (issuer, issuer.removeprefix("https://")):
+        return None
+    return claims
+
+
+async def exchange_google_code(code: str) -> dict | None:
+    """Exchange authorization code for tokens and user info."""
+    discovery = await get_google_discovery()
+    client = await open_http_client()
+    # Exchange code for token
+    token_response = await client.post(
+        discovery["token_endpoint"],
+        data={
+            "client_id": settings.GOOGLE_CLIENT_ID,
+            "client_secret": settings.GOOGLE_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+        },
+    )
+    tokens = token_response.json()
+    access_token = tokens.get("access_token")
+
+    if not access_token:
+        return None
 
-        if not access_token:
+    id_token = tokens.get("id_token")
+    if id_token:
+        # Verified locally, which saves the userinfo round trip
+        claims = await verify_google_id_token(id_token, access_token)
+        if claims is None:
             return None
+        return {
+            "id": claims["sub"],
+            "email": claims.get("email"),
+            "name": claims.get("name", claims.get("email")),
+            "picture": claims.get("picture"),
+        }
 
-        # Get user info
-        userinfo_response = await client.get(
-            GOOGLE_USERINFO_URL,
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        return userinfo_response.json()
+    # Get user info
+    userinfo_response = await client.get(
+        discovery["userinfo_endpoint"],
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    return userinfo_response.json()
@@ -1,33 +1,211 @@
+import heapq
+import hmac
+import os
 import random
-from datetime import datetime, timedelta, timezone
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from fastapi import HTTPException, status
+from app.config import get_settings
 
-# In-memory OTP store for development
-# In production, use Redis or a proper SMS service
-_otp_store: dict[str, dict] = {}
+settings = get_settings()
 
 
-def generate_otp(phone: str) -> str:
+class OTPStore(ABC):
+    """Expiring key/value store holding pending OTPs and send counters.
+
+    Keys expire on their own, so codes that are requested but never verified
+    do not accumulate. Use a shared backend (``sqlite`` or ``redis``) when
+    running more than one worker process.
+    """
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """Store ``value`` under ``key``, replacing any previous value."""
+
+    @abstractmethod
+    def delete_if_equal(self, key: str, value: str) -> bool:
+        """Atomically delete ``key`` if it holds ``value``; return whether it did."""
+
+    @abstractmethod
+    def incr(self, key: str, ttl_seconds: int) -> int:
+        """Increment a counter whose window starts at the first increment."""
+
+
+class _ExpiringMap:
+    """A dict plus an expiry heap, capped at ``max_entries`` by evicting the
+    entries closest to expiry. Not thread-safe; the store locks around it."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.data: dict[str, tuple[float, str]] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def evict(self, now: float) -> None:
+        while self._heap and (self._heap[0][0] <= now or len(self.data) >= self.max_entries):
+            expires_at, key = heapq.heappop(self._heap)
+            entry = self.data.get(key)
+            # Heap entries left behind by an overwrite no longer match the data
+            if entry is not None and entry[0] == expires_at:
+                del self.data[key]
+        if len(self._heap) > 2 * self.max_entries:
+            self._heap = [(expires_at, key) for key, (expires_at, _) in self.data.items()]
+            heapq.heapify(self._heap)
+
+    def put(self, key: str, value: str, expires_at: float) -> None:
+        self.data[key] = (expires_at, value)
+        heapq.heappush(self._heap, (expires_at, key))
+
+
+class MemoryOTPStore(OTPStore):
+    """Per-process store. Codes and counters are held and capped at
+    ``max_entries`` separately, so a flood of codes cannot evict the send
+    counters and reset a rate limit."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._values = _ExpiringMap(max_entries)
+        self._counters = _ExpiringMap(max_entries)
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._values.evict(now)
+            self._values.put(key, value, now + ttl_seconds)
+
+    def delete_if_equal(self, key: str, value: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._values.data.get(key)
+            if entry is None or entry[0] <= now or not hmac.compare_digest(entry[1], value):
+                return False
+            del self._values.data[key]
+            return True
+
+    def incr(self, key: str, ttl_seconds: int) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counters.data.get(key)
+            if entry is not None and entry[0] > now:
+                count = int(entry[1]) + 1
+                self._counters.data[key] = (entry[0], str(count))
+                return count
+            self._counters.evict(now)
+            self._counters.put(key, "1", now + ttl_seconds)
+            return 1
+
+
+class SQLiteOTPStore(OTPStore):
+    """Store in a local SQLite file, shared by every worker on the host."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS otp_store ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_otp_store_expires_at ON otp_store (expires_at)")
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM otp_store WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO otp_store (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl_seconds),
+            )
+
+    def delete_if_equal(self, key: str, value: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM otp_store WHERE key = ? AND value = ? AND expires_at > ?",
+                (key, value, time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def incr(self, key: str, ttl_seconds: int) -> int:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "INSERT INTO otp_store (key, value, expires_at) VALUES (?, '1', ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "value = CASE WHEN expires_at > ? THEN CAST(value AS INTEGER) + 1 ELSE 1 END, "
+                "expires_at = CASE WHEN expires_at > ? THEN expires_at ELSE excluded.expires_at END "
+                "RETURNING value",
+                (key, now + ttl_seconds, now, now),
+            ).fetchone()
+            return int(row[0])
+
+
+class RedisOTPStore(OTPStore):
+    """Store on any Redis-protocol server (Redis, Valkey, a local stand-in)."""
+
+    _DELETE_IF_EQUAL = (
+        "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+        "return redis.call('DEL', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url: str):
+        import redis  # optional dependency, only needed for this backend
+
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._delete_if_equal = self._client.register_script(self._DELETE_IF_EQUAL)
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._client.set(key, value, ex=ttl_seconds)
+
+    def delete_if_equal(self, key: str, value: str) -> bool:
+        return bool(self._delete_if_equal(keys=[key], args=[value]))
+
+    def incr(self, key: str, ttl_seconds: int) -> int:
+        # One MULTI round trip; SET NX starts the window only for a new key
+        pipe = self._client.pipeline(transaction=True)
+        pipe.set(key, 0, ex=ttl_seconds, nx=True)
+        pipe.incr(key)
+        return pipe.execute()[1]
+
+
+@lru_cache()
+def get_otp_store() -> OTPStore:
+    if settings.OTP_STORE == "sqlite":
+        path = settings.OTP_STORE_URL or os.path.join(tempfile.gettempdir(), "nestify-otp.sqlite3")
+        return SQLiteOTPStore(path)
+    if settings.OTP_STORE == "redis":
+        return RedisOTPStore(settings.OTP_STORE_URL or "redis://localhost:6379/0")
+    return MemoryOTPStore(settings.OTP_MAX_ENTRIES)
+
+
+def _check_send_limit(key: str, limit: int) -> None:
+    if limit <= 0:
+        return
+    window = settings.OTP_SEND_WINDOW_SECONDS
+    if get_otp_store().incr(key, window) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many OTP requests, please try again later",
+            headers={"Retry-After": str(window)},
+        )
+
+
+def generate_otp(phone: str, client_ip: str | None = None) -> str:
     """Generate and store a 6-digit OTP for a phone number."""
+    _check_send_limit(f"otp-send:phone:{phone}", settings.OTP_SEND_LIMIT_PER_PHONE)
+    if client_ip:
+        _check_send_limit(f"otp-send:ip:{client_ip}", settings.OTP_SEND_LIMIT_PER_IP)
     otp = str(random.randint(100000, 999999))
-    _otp_store[phone] = {
-        "otp": otp,
-        "expires_at": datetime.now(timezone.utc) + timedelta(minutes=5),
-    }
+    get_otp_store().set(f"otp:{phone}", otp, settings.OTP_TTL_SECONDS)
     # Mock SMS: print to console instead of sending
     print(f"[MOCK SMS] OTP for {phone}: {otp}")
     return otp
 
 
 def verify_otp(phone: str, otp: str) -> bool:
-    """Verify OTP for a phone number."""
-    stored = _otp_store.get(phone)
-    if not stored:
-        return False
-    if datetime.now(timezone.utc) > stored["expires_at"]:
-        del _otp_store[phone]
-        return False
-    if stored["otp"] != otp:
-        return False
-    # OTP verified, remove it
-    del _otp_store[phone]
-    return True
+    """Verify OTP for a phone number; a verified OTP cannot be reused."""
+    return get_otp_store().delete_if_equal(f"otp:{phone}", otp)
@@ -0,0 +1,106 @@
+"""Password hashing and verification, kept off the request threads.
+
+bcrypt is deliberately slow (roughly 250 ms per call at cost 12), so hashes
+and verifications run in a small dedicated process pool. The number of
+queued jobs is capped; once PASSWORD_HASH_MAX_PENDING are waiting, new
+requests are rejected with 429 instead of piling up behind a login storm.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.config import get_settings
+
+settings = get_settings()
+
+# min_rounds makes hashes created at a lower cost report needs_update, so
+# raising BCRYPT_ROUNDS upgrades existing users as they log in.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
+
+_executor: ProcessPoolExecutor | None = None
+_pending = 0
+_completed = 0
+_failed = 0
+_rejected = 0
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+def _get_executor() -> ProcessPoolExecutor | None:
+    global _executor
+    if _executor is None and settings.PASSWORD_HASH_WORKERS > 0:
+        # spawn, not fork: the server process has an event loop and threads
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_password_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _submit(fn, *args):
+    # Only touched from the event loop, so plain counters are safe
+    global _pending, _completed, _failed, _rejected
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        _rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        # With PASSWORD_HASH_WORKERS=0 this falls back to the default thread executor
+        result = await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool on the next call
+        _failed += 1
+        shutdown_password_pool()
+        raise
+    except BaseException:
+        _failed += 1
+        raise
+    finally:
+        _pending -= 1
+    _completed += 1
+    return result
+
+
+async def hash_password(password: str) -> str:
+    return await _submit(_hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> tuple[bool, str | None]:
+    """Return ``(valid, new_hash)``; ``new_hash`` is set when the stored hash should be replaced."""
+    return await _submit(_verify_and_update, password, password_hash)
+
+
+def password_pool_stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "pending": _pending,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "completed": _completed,
+        "failed": _failed,
+        "rejected": _rejected,
+    }
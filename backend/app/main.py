@@ -1,16 +1,54 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
+from app.database import pool_metrics
+from app.auth.deps import CurrentUser, require_role, user_cache
+from app.auth.jwt import token_cache
+from app.auth.oauth import close_http_client, open_http_client
+from app.auth.passwords import password_pool_stats, shutdown_password_pool
+from app.services.availability import busy_cache
+from app.services.events import get_event_broker
+from app.services.late_fees import late_fee_sweeper
+from app.services.visitor_archive import visitor_archiver
+from app.services.visitor_index import visitor_index
 from app.routers import auth, societies, residents, maintenance, complaints, visitors, notices, bookings, polls, dashboard
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_http_client()
+    broker = get_event_broker()
+    broker.add_listener(visitor_index.apply_event)
+    await broker.start()
+    # After subscribing, so changes made meanwhile by other workers are replayed
+    await run_in_threadpool(visitor_index.rebuild)
+    background = []
+    if settings.LATE_FEE_SWEEP_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(late_fee_sweeper(settings.LATE_FEE_SWEEP_INTERVAL_SECONDS)))
+    if settings.VISITOR_ARCHIVE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(visitor_archiver(settings.VISITOR_ARCHIVE_INTERVAL_SECONDS)))
+    yield
+    for task in background:
+        task.cancel()
+    shutdown_password_pool()
+    await broker.stop()
+    await close_http_client()
+
+
 app = FastAPI(
     title="Nestify API",
     description="Luxury Apartment Management Platform",
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -38,3 +76,18 @@ app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"]
 @app.get("/api/health")
 def health_check():
     return {"status": "healthy", "app": "Nestify API", "version": "1.0.0"}
+
+
+@app.get("/api/metrics")
+def metrics(user: CurrentUser = Depends(require_role("admin"))):
+    return {
+        "db_pool": pool_metrics(),
+        "caches": {
+            "tokens": token_cache.stats(),
+            "users": user_cache.stats(),
+            "availability": busy_cache.stats(),
+        },
+        "password_hashing": password_pool_stats(),
+        "visitor_events": get_event_broker().stats(),
+        "visitor_index": visitor_index.stats(),
+    }
@@ -5,13 +5,16 @@ from app.models.user import User
 from app.models.maintenance import MaintenanceInvoice
 from app.models.payment import Payment
 from app.models.complaint import Complaint
-from app.models.visitor import Visitor
+from app.models.visitor import Visitor, VisitorArchiveChunk
 from app.models.notice import Notice
 from app.models.booking import Booking
 from app.models.poll import Poll, Vote
+from app.models.finance import SocietyMonthlyFinance
+from app.models.job import JobRun
 
 __all__ = [
     "Society", "Tower", "Flat", "User",
     "MaintenanceInvoice", "Payment", "Complaint",
-    "Visitor", "Notice", "Booking", "Poll", "Vote",
+    "Visitor", "VisitorArchiveChunk", "Notice", "Booking", "Poll", "Vote",
+    "SocietyMonthlyFinance", "JobRun",
 ]
@@ -1,11 +1,27 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Time
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Time, Index, DDL, event, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Name surfaced by the database when two confirmed bookings overlap; the
+# router maps it to 409.
+OVERLAP_CONSTRAINT = "bookings_no_overlap"
+
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_society_facility_date", "society_id", "facility_name", "booking_date"),
+        ExcludeConstraint(
+            ("society_id", "="),
+            ("facility_name", "="),
+            (text("tsrange(booking_date + start_time, booking_date + end_time, '[)')"), "&&"),
+            name=OVERLAP_CONSTRAINT,
+            using="gist",
+            where=text("status = 'confirmed'"),
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     society_id = Column(Integer, ForeignKey("societies.id"), nullable=False)
@@ -20,3 +36,35 @@ class Booking(Base):
     # Relationships
     society = relationship("Society", back_populates="bookings")
     user = relationship("User", back_populates="bookings")
+
+
+# PostgreSQL needs btree_gist for the equality parts of the exclusion constraint.
+event.listen(
+    Booking.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+
+# SQLite has no exclusion constraints; it serializes writers, so a trigger
+# checking for overlaps inside the write gives the same guarantee.
+_SQLITE_OVERLAP_CHECK = """
+    WHEN NEW.status = 'confirmed' AND EXISTS (
+        SELECT 1 FROM bookings b
+        WHERE b.id IS NOT NEW.id
+          AND b.society_id = NEW.society_id
+          AND b.facility_name = NEW.facility_name
+          AND b.booking_date = NEW.booking_date
+          AND b.status = 'confirmed'
+          AND b.start_time < NEW.end_time
+          AND b.end_time > NEW.start_time
+    )
+    BEGIN
+        SELECT RAISE(ABORT, '{name}');
+    END
+""".format(name=OVERLAP_CONSTRAINT)
+
+for _trigger in (
+    f"CREATE TRIGGER {OVERLAP_CONSTRAINT}_insert BEFORE INSERT ON bookings" + _SQLITE_OVERLAP_CHECK,
+    f"CREATE TRIGGER {OVERLAP_CONSTRAINT}_update BEFORE UPDATE OF "
+    "status, booking_date, start_time, end_time, facility_name ON bookings" + _SQLITE_OVERLAP_CHECK,
+):
+    event.listen(Booking.__table__, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.search import SearchIndex
 
 
 class Complaint(Base):
     __tablename__ = "complaints"
+    __table_args__ = (
+        Index("ix_complaints_society_created", "society_id", "created_at"),
+        Index("ix_complaints_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     society_id = Column(Integer, ForeignKey("societies.id"), nullable=False)
@@ -24,3 +29,6 @@ class Complaint(Base):
     society = relationship("Society", back_populates="complaints")
     user = relationship("User", back_populates="complaints", foreign_keys=[user_id])
     flat = relationship("Flat", back_populates="complaints")
+
+
+complaint_search = SearchIndex(Complaint.__table__, title="A", description="B")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SocietyMonthlyFinance(Base):
+    # Rollup of invoice/payment totals per billing month, kept current by
+    # app/services/finance.py from the maintenance write paths.
+    __tablename__ = "society_monthly_finance"
+    __table_args__ = (
+        UniqueConstraint("society_id", "year", "month", name="uq_society_monthly_finance_period"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    society_id = Column(Integer, ForeignKey("societies.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    collected = Column(Float, nullable=False, default=0.0)
+    pending = Column(Float, nullable=False, default=0.0)
+    overdue = Column(Float, nullable=False, default=0.0)
+    late_fee = Column(Float, nullable=False, default=0.0)
+    pending_count = Column(Integer, nullable=False, default=0)
+    overdue_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
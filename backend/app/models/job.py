@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    name = Column(String(100), primary_key=True)  # late_fee_sweep, ...
+    last_run_at = Column(DateTime(timezone=True), nullable=False)
+    last_affected = Column(Integer, nullable=False, default=0)
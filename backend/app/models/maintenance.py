@@ -1,11 +1,26 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Date
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+PERIOD_CONSTRAINT = "uq_invoices_flat_period"
+
 
 class MaintenanceInvoice(Base):
     __tablename__ = "maintenance_invoices"
+    __table_args__ = (
+        # One invoice per flat per billing month; bulk generation relies on it
+        Index(PERIOD_CONSTRAINT, "flat_id", "year", "month", unique=True),
+        Index("ix_invoices_society_status", "society_id", "status"),
+        Index("ix_invoices_society_period", "society_id", "year", "month"),
+        Index("ix_invoices_society_created", "society_id", "created_at"),
+        Index("ix_invoices_flat_created", "flat_id", "created_at"),
+        Index(
+            "ix_invoices_pending_due", "due_date",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     society_id = Column(Integer, ForeignKey("societies.id"), nullable=False)
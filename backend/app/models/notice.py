@@ -1,11 +1,15 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from app.search import SearchIndex
 
 
 class Notice(Base):
     __tablename__ = "notices"
+    __table_args__ = (
+        Index("ix_notices_society_created", "society_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     society_id = Column(Integer, ForeignKey("societies.id", ondelete="CASCADE"), nullable=False)
@@ -19,3 +23,6 @@ class Notice(Base):
 
     # Relationships
     society = relationship("Society", back_populates="notices")
+
+
+notice_search = SearchIndex(Notice.__table__, title="A", content="B")
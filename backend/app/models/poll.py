@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,6 +6,9 @@ from app.database import Base
 
 class Poll(Base):
     __tablename__ = "polls"
+    __table_args__ = (
+        Index("ix_polls_society_created", "society_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     society_id = Column(Integer, ForeignKey("societies.id"), nullable=False)
@@ -23,6 +26,9 @@ class Poll(Base):
 
 class Vote(Base):
     __tablename__ = "votes"
+    __table_args__ = (
+        Index("ix_votes_poll_user", "poll_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,7 +6,18 @@ from app.database import Base
 
 class Visitor(Base):
     __tablename__ = "visitors"
+    __table_args__ = (
+        Index("ix_visitors_society_created", "society_id", "created_at"),
+        Index("ix_visitors_flat_created", "flat_id", "created_at"),
+        Index(
+            "ix_visitors_society_active", "society_id",
+            postgresql_where=text("status IN ('pending', 'approved')"),
+            sqlite_where=text("status IN ('pending', 'approved')"),
+        ),
+    )
 
+    # On PostgreSQL the table is partitioned by month on created_at and its
+    # primary key is (id, created_at); ids still come from one sequence.
     id = Column(Integer, primary_key=True, index=True)
     society_id = Column(Integer, ForeignKey("societies.id"), nullable=False)
     flat_id = Column(Integer, ForeignKey("flats.id"), nullable=False)
@@ -18,8 +29,26 @@ class Visitor(Base):
     exit_time = Column(DateTime(timezone=True), nullable=True)
     status = Column(String(20), default="pending")  # pending, approved, rejected, checked_out
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    pass_id = Column(String(32), nullable=True)  # set for entries made with a pre-approved pass
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     society = relationship("Society", back_populates="visitors")
     flat = relationship("Flat", back_populates="visitors")
+
+
+class VisitorArchiveChunk(Base):
+    """Archived visitors of one society and month: gzip'd JSON lines, one
+    ``VisitorOut`` per line. A month may be spread over several chunks."""
+    __tablename__ = "visitor_archive"
+    __table_args__ = (
+        Index("ix_visitor_archive_society_period", "society_id", "year", "month"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    society_id = Column(Integer, ForeignKey("societies.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
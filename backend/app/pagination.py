@@ -0,0 +1,158 @@
+"""Keyset pagination and shared filters for list endpoints.
+
+Pages are ordered newest first on ``(sort_column, id)``. The cursor handed
+back to clients is an opaque base64 token of the last row's key.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, func, or_, select
+from app.models.flat import Flat
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@dataclass
+class PageParams:
+    cursor: str | None
+    limit: int
+
+
+@dataclass
+class ListFilters:
+    status: str | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    flat_id: int | None = None
+    tower_id: int | None = None
+
+
+def page_params(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=min(limit, MAX_PAGE_SIZE))
+
+
+def list_filters(
+    status: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    flat_id: int | None = None,
+    tower_id: int | None = None,
+) -> ListFilters:
+    return ListFilters(status, date_from, date_to, flat_id, tower_id)
+
+
+def _is_datetime(column) -> bool:
+    return issubclass(column.type.python_type, datetime)
+
+
+def encode_cursor(value, row_id: int) -> str:
+    raw = json.dumps([value.isoformat() if value is not None else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, column) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        parse = datetime.fromisoformat if _is_datetime(column) else date.fromisoformat
+        return parse(value), int(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_filters(query, filters: ListFilters, *, status_column=None, date_column=None, flat_column=None):
+    """Apply ``filters`` to ``query`` using the columns the endpoint supports.
+
+    A filter whose column is not passed is rejected with 400 rather than
+    silently ignored.
+    """
+    unsupported = []
+
+    if filters.status is not None:
+        if status_column is None:
+            unsupported.append("status")
+        else:
+            query = query.filter(status_column == filters.status)
+
+    if filters.date_from is not None or filters.date_to is not None:
+        if date_column is None:
+            unsupported.append("date_from/date_to")
+        elif _is_datetime(date_column):
+            if filters.date_from is not None:
+                query = query.filter(date_column >= datetime.combine(filters.date_from, time.min))
+            if filters.date_to is not None:
+                query = query.filter(date_column < datetime.combine(filters.date_to + timedelta(days=1), time.min))
+        else:
+            if filters.date_from is not None:
+                query = query.filter(date_column >= filters.date_from)
+            if filters.date_to is not None:
+                query = query.filter(date_column <= filters.date_to)
+
+    if filters.flat_id is not None or filters.tower_id is not None:
+        if flat_column is None:
+            unsupported.append("flat_id/tower_id")
+        else:
+            if filters.flat_id is not None:
+                query = query.filter(flat_column == filters.flat_id)
+            if filters.tower_id is not None:
+                query = query.filter(flat_column.in_(select(Flat.id).where(Flat.tower_id == filters.tower_id)))
+
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported filter(s): {', '.join(unsupported)}")
+    return query
+
+
+def _keyset(query, page: PageParams, sort_column, id_column, dialect_name: str):
+    """Apply the cursor predicate, ordering and limit to a Query or Select."""
+    key = sort_column
+    to_key = lambda value: value
+    if _is_datetime(sort_column) and dialect_name == "sqlite":
+        # SQLite stores timestamps as text in more than one format
+        # (CURRENT_TIMESTAMP vs. bound datetimes); compare them numerically.
+        key = func.julianday(sort_column)
+        to_key = func.julianday
+
+    if page.cursor:
+        value, row_id = decode_cursor(page.cursor, sort_column)
+        query = query.filter(or_(
+            key < to_key(value),
+            and_(key == to_key(value), id_column < row_id),
+        ))
+    return query.order_by(key.desc(), id_column.desc()).limit(page.limit + 1)
+
+
+def _page(rows: list, page: PageParams, sort_column, id_column) -> dict:
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def paginate(query, page: PageParams, sort_column, id_column) -> dict:
+    """Return one page of ``query`` as ``{"items": [...], "next_cursor": ...}``."""
+    dialect_name = query.session.get_bind().dialect.name
+    rows = _keyset(query, page, sort_column, id_column, dialect_name).all()
+    return _page(rows, page, sort_column, id_column)
+
+
+async def paginate_async(db, stmt, page: PageParams, sort_column, id_column, *, rows: bool = False) -> dict:
+    """``paginate`` for a ``select()`` run through a ReadSession.
+
+    Items are entities, or result rows when ``rows`` is set (column selects).
+    """
+    result = await db.execute(_keyset(stmt, page, sort_column, id_column, db.dialect_name))
+    items = result.all() if rows else result.scalars().all()
+    return _page(items, page, sort_column, id_column)
+
+
+def empty_page() -> dict:
+    return {"items": [], "next_cursor": None}
@@ -0,0 +1,73 @@
+"""JSON responses for list endpoints that skip per-row pydantic work.
+
+List endpoints keep their ``response_model`` for the OpenAPI schema, but can
+return ``RowSerializer(...).page_response(...)`` instead of ORM objects.
+The rows come from a select of exactly the schema's columns, so their values
+already have the schema's types; they are zipped into dicts and written by
+orjson, without hydrating entities or validating and re-serializing every
+field through the ``Out`` model.
+"""
+from typing import Callable, Iterable
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import func
+
+
+class RowsResponse(ORJSONResponse):
+    # OPT_UTC_Z matches pydantic's "Z" suffix for UTC datetimes
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class RowSerializer:
+    """Serialize result rows the way ``schema`` would.
+
+    ``converters`` map a field to the function its ``field_serializer`` uses,
+    so the output is identical to the validated path.
+    """
+
+    def __init__(self, schema: type[BaseModel], **converters: Callable):
+        self.fields = tuple(schema.model_fields)
+        unknown = set(converters) - set(self.fields)
+        if unknown:
+            raise ValueError(f"{schema.__name__} has no fields {', '.join(sorted(unknown))}")
+        self.converters = tuple(converters.items())
+
+    def columns(self, model, **expressions) -> list:
+        """The model's columns for every schema field, in schema order.
+
+        ``expressions`` replace the column of a field, or supply fields the
+        model has no column for.
+        """
+        return [
+            expressions[field].label(field) if field in expressions else getattr(model, field)
+            for field in self.fields
+        ]
+
+    def items(self, rows: Iterable) -> list[dict]:
+        fields, converters = self.fields, self.converters
+        items = [dict(zip(fields, row)) for row in rows]
+        for field, convert in converters:
+            for item in items:
+                item[field] = convert(item[field])
+        return items
+
+    def page_response(self, page: dict) -> RowsResponse:
+        return RowsResponse({"items": self.items(page["items"]), "next_cursor": page["next_cursor"]})
+
+    def list_response(self, rows: Iterable) -> RowsResponse:
+        return RowsResponse(self.items(rows))
+
+
+def text_preview(column, chars: int) -> dict:
+    """Expressions for the first ``chars`` characters of a text column and a
+    ``<field>_truncated`` flag, for use with ``RowSerializer.columns``.
+
+    Only the preview leaves the database; detail endpoints load the full text.
+    The flag is an integer on SQLite, so serialize it with ``bool``.
+    """
+    return {
+        column.key: func.substr(column, 1, chars),
+        f"{column.key}_truncated": func.coalesce(func.length(column) > chars, False),
+    }
@@ -1,23 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from app.database import get_db
 from app.models.user import User
 from app.schemas.schemas import (
     OTPRequest, OTPVerify, LoginRequest, TokenResponse, UserOut, UserCreate
 )
-from app.auth.jwt import create_access_token
+from app.auth.jwt import create_access_token, user_claims
+from app.auth.passwords import hash_password, verify_password
 from app.auth.oauth import get_google_auth_url, exchange_google_code
 from app.auth.otp import generate_otp, verify_otp
-from app.auth.deps import get_current_user
+from app.auth.deps import CurrentUser, get_current_user, invalidate_user
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 @router.post("/register", response_model=UserOut)
-def register(data: UserCreate, db: Session = Depends(get_db)):
-    # Check if user exists
+async def register(data: UserCreate, db: Session = Depends(get_db)):
+    await run_in_threadpool(_ensure_unregistered, db, data)
+    hashed_pw = await hash_password(data.password) if data.password else None
+    return await run_in_threadpool(_create_user, db, data, hashed_pw)
+
+
+@router.post("/login", response_model=TokenResponse)
+async def login(data: LoginRequest, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_login_user, db, data.email)
+    if not user or not user.password_hash:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_password(data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash uses an outdated cost; upgrade it while we have the password
+        await run_in_threadpool(_update_password_hash, db, user.id, new_hash)
+    token = create_access_token(user_claims(user))
+    return TokenResponse(access_token=token, user=UserOut.model_validate(user))
+
+
+def _find_login_user(db: Session, email: str) -> User | None:
+    user = db.query(User).filter(User.email == email).first()
+    if user:
+        # Detach and end the transaction so the pooled connection is not
+        # held for the duration of the bcrypt check.
+        db.expunge(user)
+        db.commit()
+    return user
+
+
+def _ensure_unregistered(db: Session, data: UserCreate) -> None:
     if data.email:
         existing = db.query(User).filter(User.email == data.email).first()
         if existing:
@@ -27,7 +57,8 @@ def register(data: UserCreate, db: Session = Depends(get_db)):
         if existing:
             raise HTTPException(status_code=400, detail="Phone already registered")
 
-    hashed_pw = pwd_context.hash(data.password) if data.password else None
+
+def _create_user(db: Session, data: UserCreate, hashed_pw: str | None) -> User:
     user = User(
         name=data.name,
         email=data.email,
@@ -41,23 +72,18 @@ def register(data: UserCreate, db: Session = Depends(get_db)):
     db.add(user)
     db.commit()
     db.refresh(user)
+    invalidate_user(user.id)
     return user
 
 
-@router.post("/login", response_model=TokenResponse)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not user.password_hash:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not pwd_context.verify(data.password, user.password_hash):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token({"sub": str(user.id), "role": user.role})
-    return TokenResponse(access_token=token, user=UserOut.model_validate(user))
+def _update_password_hash(db: Session, user_id: int, password_hash: str) -> None:
+    db.query(User).filter(User.id == user_id).update({User.password_hash: password_hash})
+    db.commit()
 
 
 @router.post("/otp/send")
-def send_otp(data: OTPRequest):
-    otp = generate_otp(data.phone)
+def send_otp(data: OTPRequest, request: Request):
+    otp = generate_otp(data.phone, request.client.host if request.client else None)
     return {"message": f"OTP sent to {data.phone}", "otp_dev": otp}
 
 
@@ -77,14 +103,15 @@ def verify_phone_otp(data: OTPVerify, db: Session = Depends(get_db)):
         db.add(user)
         db.commit()
         db.refresh(user)
+        invalidate_user(user.id)
 
-    token = create_access_token({"sub": str(user.id), "role": user.role})
+    token = create_access_token(user_claims(user))
     return TokenResponse(access_token=token, user=UserOut.model_validate(user))
 
 
 @router.get("/google/url")
-def google_login_url():
-    return {"url": get_google_auth_url()}
+async def google_login_url():
+    return {"url": await get_google_auth_url()}
 
 
 @router.get("/google/callback")
@@ -93,6 +120,17 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
     if not userinfo or "email" not in userinfo:
         raise HTTPException(status_code=400, detail="Google authentication failed")
 
+    # The session is synchronous; keep its queries off the event loop
+    user = await run_in_threadpool(_upsert_google_user, db, userinfo)
+
+    token = create_access_token(user_claims(user))
+    # Redirect to frontend with token
+    from app.config import get_settings
+    settings = get_settings()
+    return {"access_token": token, "user": UserOut.model_validate(user)}
+
+
+def _upsert_google_user(db: Session, userinfo: dict) -> User:
     google_id = userinfo.get("id")
     email = userinfo.get("email")
     name = userinfo.get("name", email)
@@ -115,14 +153,10 @@ async def google_callback(code: str, db: Session = Depends(get_db)):
             db.add(user)
         db.commit()
         db.refresh(user)
-
-    token = create_access_token({"sub": str(user.id), "role": user.role})
-    # Redirect to frontend with token
-    from app.config import get_settings
-    settings = get_settings()
-    return {"access_token": token, "user": UserOut.model_validate(user)}
+        invalidate_user(user.id)
+    return user
 
 
 @router.get("/me", response_model=UserOut)
-def get_me(current_user: User = Depends(get_current_user)):
-    return current_user
+def get_me(current_user: CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
+    return db.query(User).filter(User.id == current_user.id).first()
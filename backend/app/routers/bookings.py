@@ -1,24 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
 from datetime import date, time
 from app.database import get_db
-from app.models.booking import Booking
-from app.models.user import User
-from app.schemas.schemas import BookingCreate, BookingOut
-from app.auth.deps import get_current_user
+from app.models.booking import Booking, OVERLAP_CONSTRAINT
+from app.schemas.schemas import BookingCreate, BookingOut, Page, AvailabilityOut, format_date, format_hhmm
+from app.responses import RowSerializer
+from app.auth.deps import CurrentUser, get_current_user
+from app.config import get_settings
+from app.services.availability import busy_by_day, format_minutes, free_intervals, invalidate_busy, parse_slot, to_minutes
+from app.pagination import ListFilters, PageParams, apply_filters, list_filters, page_params, paginate
 
 router = APIRouter()
+booking_rows = RowSerializer(
+    BookingOut, booking_date=format_date, start_time=format_hhmm, end_time=format_hhmm,
+)
+settings = get_settings()
 
+EXCLUSION_VIOLATION = "23P01"  # PostgreSQL SQLSTATE
+MAX_AVAILABILITY_DAYS = 31
 
-@router.get("/", response_model=list[BookingOut])
+
+@router.get("/", response_model=Page[BookingOut])
 def list_bookings(
     facility: str | None = None,
     booking_date: str | None = None,
+    page: PageParams = Depends(page_params),
+    filters: ListFilters = Depends(list_filters),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    query = db.query(Booking)
+    query = db.query(*booking_rows.columns(Booking))
     if user.society_id:
         query = query.filter(Booking.society_id == user.society_id)
     if facility:
@@ -29,14 +41,56 @@ def list_bookings(
             query = query.filter(Booking.booking_date == parsed_date)
         except ValueError:
             pass
-    return query.order_by(Booking.booking_date.desc()).all()
+    query = apply_filters(query, filters, status_column=Booking.status, date_column=Booking.booking_date)
+    return booking_rows.page_response(paginate(query, page, Booking.booking_date, Booking.id))
+
+
+@router.get("/availability", response_model=AvailabilityOut)
+def facility_availability(
+    facility: str,
+    from_date: date = Query(..., alias="from"),
+    to_date: date | None = Query(None, alias="to"),
+    slot: str = "30m",
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    to_date = to_date or from_date
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (to_date - from_date).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_AVAILABILITY_DAYS} days")
+    try:
+        slot_minutes = parse_slot(slot)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    open_at = to_minutes(time.fromisoformat(settings.FACILITY_OPEN_TIME))
+    close_at = to_minutes(time.fromisoformat(settings.FACILITY_CLOSE_TIME))
+    busy = busy_by_day(db, user.society_id, facility, from_date, to_date)
+    as_json = lambda intervals: [{"start": format_minutes(s), "end": format_minutes(e)} for s, e in intervals]
+    return {
+        "facility": facility,
+        "slot_minutes": slot_minutes,
+        "open_time": format_minutes(open_at),
+        "close_time": format_minutes(close_at),
+        "days": [
+            {
+                "day": day,
+                "busy": as_json(intervals),
+                "free": as_json(free_intervals(intervals, open_at, close_at, slot_minutes)),
+            }
+            for day, intervals in sorted(busy.items())
+        ],
+    }
 
 
 @router.post("/", response_model=BookingOut)
 def create_booking(
     data: BookingCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     society_id = data.society_id or user.society_id
     if not society_id:
@@ -61,21 +115,6 @@ def create_booking(
     if start >= end:
         raise HTTPException(status_code=400, detail="Start time must be before end time")
 
-    # Check for double booking
-    conflict = db.query(Booking).filter(
-        and_(
-            Booking.society_id == society_id,
-            Booking.facility_name == data.facility_name,
-            Booking.booking_date == booking_date,
-            Booking.status == "confirmed",
-            Booking.start_time < end,
-            Booking.end_time > start,
-        )
-    ).first()
-
-    if conflict:
-        raise HTTPException(status_code=409, detail="Time slot already booked for this facility")
-
     booking = Booking(
         society_id=society_id,
         user_id=user.id,
@@ -83,9 +122,19 @@ def create_booking(
         booking_date=booking_date,
         start_time=start,
         end_time=end,
+        status="confirmed",
     )
     db.add(booking)
-    db.commit()
+    # Overlaps are rejected by the database (exclusion constraint on
+    # PostgreSQL, trigger on SQLite), so concurrent requests cannot both win.
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if OVERLAP_CONSTRAINT in str(e.orig) or getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+            raise HTTPException(status_code=409, detail="Time slot already booked for this facility")
+        raise
+    invalidate_busy(society_id, booking.facility_name, booking.booking_date)
     db.refresh(booking)
     return booking
 
@@ -94,7 +143,7 @@ def create_booking(
 def cancel_booking(
     booking_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
@@ -103,4 +152,5 @@ def cancel_booking(
         raise HTTPException(status_code=403, detail="Access denied")
     booking.status = "cancelled"
     db.commit()
+    invalidate_busy(booking.society_id, booking.facility_name, booking.booking_date)
     return {"message": "Booking cancelled"}
@@ -1,33 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.complaint import Complaint
-from app.models.user import User
-from app.schemas.schemas import ComplaintCreate, ComplaintUpdate, ComplaintOut
-from app.auth.deps import get_current_user, require_role
+from app.models.complaint import Complaint, complaint_search
+from app.schemas.schemas import ComplaintCreate, ComplaintUpdate, ComplaintOut, ComplaintListOut, Page
+from app.auth.deps import CurrentUser, get_current_user, require_role
+from app.config import get_settings
+from app.pagination import ListFilters, PageParams, apply_filters, list_filters, page_params, paginate
+from app.responses import RowSerializer, text_preview
 
 router = APIRouter()
+settings = get_settings()
+complaint_rows = RowSerializer(ComplaintListOut, description_truncated=bool)
 
 
-@router.get("/", response_model=list[ComplaintOut])
+def _visible_complaints(db: Session, user: CurrentUser):
+    """List rows of the complaints ``user`` may see: the society's for admins, else their own."""
+    query = db.query(*complaint_rows.columns(
+        Complaint, **text_preview(Complaint.description, settings.LIST_PREVIEW_CHARS)
+    ))
+    if user.role == "admin" and user.society_id:
+        return query.filter(Complaint.society_id == user.society_id)
+    return query.filter(Complaint.user_id == user.id)
+
+
+@router.get("/", response_model=Page[ComplaintListOut])
 def list_complaints(
+    page: PageParams = Depends(page_params),
+    filters: ListFilters = Depends(list_filters),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    if user.role == "admin" and user.society_id:
-        return db.query(Complaint).filter(
-            Complaint.society_id == user.society_id
-        ).order_by(Complaint.created_at.desc()).all()
-    return db.query(Complaint).filter(
-        Complaint.user_id == user.id
-    ).order_by(Complaint.created_at.desc()).all()
+    query = apply_filters(
+        _visible_complaints(db, user), filters,
+        status_column=Complaint.status,
+        date_column=Complaint.created_at,
+        flat_column=Complaint.flat_id,
+    )
+    return complaint_rows.page_response(paginate(query, page, Complaint.created_at, Complaint.id))
+
+
+@router.get("/search", response_model=Page[ComplaintListOut])
+def search_complaints(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Complaints whose title or description match ``q``, best match first."""
+    query = complaint_search.apply(_visible_complaints(db, user), q, page, db.get_bind().dialect.name)
+    return complaint_rows.page_response(complaint_search.page(query.all(), page))
+
+
+@router.get("/{complaint_id}", response_model=ComplaintOut)
+def get_complaint(
+    complaint_id: int,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    if not complaint or not (
+        complaint.user_id == user.id
+        or (user.role == "admin" and complaint.society_id == user.society_id)
+    ):
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    return complaint
 
 
 @router.post("/", response_model=ComplaintOut)
 def create_complaint(
     data: ComplaintCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     society_id = data.society_id or user.society_id
     if not society_id:
@@ -52,7 +95,7 @@ def update_complaint(
     complaint_id: int,
     data: ComplaintUpdate,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
     if not complaint:
@@ -1,23 +1,24 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, literal, select
 from datetime import date
 import calendar
-from app.database import get_db
+from app.database import ReadSession, get_read_db
 from app.models.maintenance import MaintenanceInvoice
 from app.models.payment import Payment
+from app.models.finance import SocietyMonthlyFinance
 from app.models.complaint import Complaint
 from app.models.visitor import Visitor
 from app.models.user import User
-from app.auth.deps import get_current_user
+from app.auth.deps import CurrentUser, get_current_user
+from app.services.visitor_index import visitor_index
 
 router = APIRouter()
 
 
 @router.get("/admin")
-def admin_dashboard(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def admin_dashboard(
+    db: ReadSession = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user),
 ):
     sid = user.society_id
     if not sid:
@@ -28,40 +29,36 @@ def admin_dashboard(
             "monthly_data": [], "complaints_data": [],
         }
 
-    # Total collections (scoped to society)
-    total_collected = db.query(func.sum(Payment.amount)).join(MaintenanceInvoice).filter(
-        MaintenanceInvoice.society_id == sid
-    ).scalar() or 0
-
-    # Pending dues
-    pending_invoices = db.query(MaintenanceInvoice).filter(
-        MaintenanceInvoice.society_id == sid,
-        MaintenanceInvoice.status.in_(["pending", "overdue"])
-    ).all()
-    total_pending = sum(inv.total_amount for inv in pending_invoices)
-    pending_count = len(pending_invoices)
+    # Collections and dues per billing month, from the finance rollup
+    finance_rows = (await db.execute(
+        select(SocietyMonthlyFinance).where(SocietyMonthlyFinance.society_id == sid)
+    )).scalars().all()
+    finance_by_month = {(row.year, row.month): row for row in finance_rows}
+    total_collected = sum(row.collected for row in finance_by_month.values()) or 0
+    total_pending = sum(row.pending + row.overdue for row in finance_by_month.values()) or 0
+    pending_count = sum(row.pending_count + row.overdue_count for row in finance_by_month.values())
 
     # Complaints summary
-    total_complaints = db.query(func.count(Complaint.id)).filter(Complaint.society_id == sid).scalar() or 0
-    open_complaints = db.query(func.count(Complaint.id)).filter(
-        Complaint.society_id == sid, Complaint.status == "open"
-    ).scalar() or 0
-    in_progress = db.query(func.count(Complaint.id)).filter(
-        Complaint.society_id == sid, Complaint.status == "in_progress"
-    ).scalar() or 0
-    resolved = db.query(func.count(Complaint.id)).filter(
-        Complaint.society_id == sid, Complaint.status == "resolved"
-    ).scalar() or 0
-
-    # Total residents
-    total_residents = db.query(func.count(User.id)).filter(
-        User.society_id == sid, User.role == "resident", User.is_active == True
-    ).scalar() or 0
-
-    # Active visitors
-    active_visitors = db.query(func.count(Visitor.id)).filter(
-        Visitor.society_id == sid, Visitor.status.in_(["pending", "approved"])
-    ).scalar() or 0
+    complaints_by_status = dict((await db.execute(
+        select(Complaint.status, func.count(Complaint.id)).where(
+            Complaint.society_id == sid
+        ).group_by(Complaint.status)
+    )).all())
+    total_complaints = sum(complaints_by_status.values())
+    open_complaints = complaints_by_status.get("open", 0)
+    in_progress = complaints_by_status.get("in_progress", 0)
+    resolved = complaints_by_status.get("resolved", 0)
+
+    # Total residents and active visitors in a single round trip; the visitor
+    # count comes from the in-memory index once it has loaded
+    total_residents, active_visitors = (await db.execute(select(
+        select(func.count(User.id)).where(
+            User.society_id == sid, User.role == "resident", User.is_active == True
+        ).scalar_subquery(),
+        literal(visitor_index.count(sid)) if visitor_index.ready else select(func.count(Visitor.id)).where(
+            Visitor.society_id == sid, Visitor.status.in_(["pending", "approved"])
+        ).scalar_subquery(),
+    ))).one()
 
     # Monthly collection data (last 6 months)
     monthly_data = []
@@ -72,17 +69,9 @@ def admin_dashboard(
         while m <= 0:
             m += 12
             y -= 1
-        month_total = db.query(func.sum(Payment.amount)).join(MaintenanceInvoice).filter(
-            MaintenanceInvoice.society_id == sid,
-            MaintenanceInvoice.month == m,
-            MaintenanceInvoice.year == y,
-        ).scalar() or 0
-        month_pending = db.query(func.sum(MaintenanceInvoice.total_amount)).filter(
-            MaintenanceInvoice.society_id == sid,
-            MaintenanceInvoice.month == m,
-            MaintenanceInvoice.year == y,
-            MaintenanceInvoice.status.in_(["pending", "overdue"]),
-        ).scalar() or 0
+        row = finance_by_month.get((y, m))
+        month_total = (row.collected if row else 0) or 0
+        month_pending = (row.pending + row.overdue if row else 0) or 0
         monthly_data.append({
             "month": calendar.month_abbr[m],
             "collected": round(month_total, 2),
@@ -109,24 +98,30 @@ def admin_dashboard(
 
 
 @router.get("/resident")
-def resident_dashboard(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+async def resident_dashboard(
+    db: ReadSession = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user),
 ):
     # My invoices
-    my_invoices = db.query(MaintenanceInvoice).filter(
-        MaintenanceInvoice.flat_id == user.flat_id
-    ).order_by(MaintenanceInvoice.created_at.desc()).limit(10).all() if user.flat_id else []
+    my_invoices = (await db.execute(
+        select(MaintenanceInvoice).where(
+            MaintenanceInvoice.flat_id == user.flat_id
+        ).order_by(MaintenanceInvoice.created_at.desc()).limit(10)
+    )).scalars().all() if user.flat_id else []
 
     # My payments
-    my_payments = db.query(Payment).filter(
-        Payment.user_id == user.id
-    ).order_by(Payment.payment_date.desc()).limit(10).all()
+    my_payments = (await db.execute(
+        select(Payment).where(
+            Payment.user_id == user.id
+        ).order_by(Payment.payment_date.desc()).limit(10)
+    )).scalars().all()
 
     # My complaints
-    my_complaints = db.query(Complaint).filter(
-        Complaint.user_id == user.id
-    ).order_by(Complaint.created_at.desc()).limit(10).all()
+    my_complaints = (await db.execute(
+        select(Complaint).where(
+            Complaint.user_id == user.id
+        ).order_by(Complaint.created_at.desc()).limit(10)
+    )).scalars().all()
 
     pending_amount = sum(inv.total_amount for inv in my_invoices if inv.status in ("pending", "overdue"))
     paid_amount = sum(p.amount for p in my_payments)
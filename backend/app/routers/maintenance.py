@@ -1,53 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from datetime import date
-from app.database import get_db
-from app.models.maintenance import MaintenanceInvoice
+from typing import Literal
+from app.database import ReadSession, get_db, get_read_db
+from app.models.flat import Flat
+from app.models.maintenance import MaintenanceInvoice, PERIOD_CONSTRAINT
 from app.models.payment import Payment
-from app.models.user import User
-from app.schemas.schemas import InvoiceCreate, InvoiceOut, PaymentCreate, PaymentOut
-from app.auth.deps import get_current_user, require_role
+from app.models.job import JobRun
+from app.schemas.schemas import (
+    InvoiceCreate, InvoiceGenerate, InvoiceGenerateOut, InvoiceOut, PaymentCreate, PaymentOut, Page,
+    format_date,
+)
+from app.auth.deps import CurrentUser, get_current_user, require_role
+from app.pagination import ListFilters, PageParams, apply_filters, empty_page, list_filters, page_params, paginate, paginate_async
+from app.services.finance import record_invoice_created, record_invoice_paid
+from app.responses import RowSerializer
+from app.services.exports import export_response
+from app.services.invoicing import generate_invoices
+from app.services.late_fees import SWEEP_JOB_NAME, run_late_fee_sweep
 
 router = APIRouter()
+invoice_rows = RowSerializer(InvoiceOut, due_date=format_date)
+payment_rows = RowSerializer(PaymentOut)
 
 
 # --- Invoices ---
-@router.get("/invoices", response_model=list[InvoiceOut])
-def list_invoices(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+@router.get("/invoices", response_model=Page[InvoiceOut])
+async def list_invoices(
+    page: PageParams = Depends(page_params),
+    filters: ListFilters = Depends(list_filters),
+    db: ReadSession = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user),
 ):
+    # Overdue status and late fees are applied by app.services.late_fees
+    stmt = select(*invoice_rows.columns(MaintenanceInvoice))
     if user.role in ("admin", "treasurer") and user.society_id:
-        invoices = db.query(MaintenanceInvoice).filter(
-            MaintenanceInvoice.society_id == user.society_id
-        ).order_by(MaintenanceInvoice.created_at.desc()).all()
+        stmt = stmt.where(MaintenanceInvoice.society_id == user.society_id)
     elif user.flat_id:
-        invoices = db.query(MaintenanceInvoice).filter(
-            MaintenanceInvoice.flat_id == user.flat_id
-        ).order_by(MaintenanceInvoice.created_at.desc()).all()
+        stmt = stmt.where(MaintenanceInvoice.flat_id == user.flat_id)
     else:
-        invoices = []
-
-    # Auto-apply late fee for overdue invoices
-    today = date.today()
-    changed = False
-    for inv in invoices:
-        if inv.status == "pending" and inv.due_date < today:
-            inv.status = "overdue"
-            if inv.late_fee == 0:
-                inv.late_fee = inv.amount * 0.1  # 10% late fee
-                inv.total_amount = inv.amount + inv.late_fee
-            changed = True
-    if changed:
-        db.commit()
-    return invoices
+        return empty_page()
+    stmt = apply_filters(
+        stmt, filters,
+        status_column=MaintenanceInvoice.status,
+        date_column=MaintenanceInvoice.created_at,
+        flat_column=MaintenanceInvoice.flat_id,
+    )
+    page = await paginate_async(db, stmt, page, MaintenanceInvoice.created_at, MaintenanceInvoice.id, rows=True)
+    return invoice_rows.page_response(page)
+
+
+@router.get("/invoices/export")
+def export_invoices(
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    filters: ListFilters = Depends(list_filters),
+    user: CurrentUser = Depends(require_role("admin", "treasurer")),
+):
+    """Stream every matching invoice of the society as CSV or XLSX."""
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    inv = MaintenanceInvoice
+    stmt = select(
+        inv.id, Flat.flat_number.label("flat"), inv.month, inv.year, inv.amount, inv.late_fee,
+        inv.total_amount, inv.due_date, inv.status, inv.created_at,
+    ).join(Flat, inv.flat_id == Flat.id).where(inv.society_id == user.society_id)
+    stmt = apply_filters(
+        stmt, filters, status_column=inv.status, date_column=inv.created_at, flat_column=inv.flat_id,
+    )
+    return export_response(stmt.order_by(inv.id), fmt, "invoices")
 
 
 @router.post("/invoices", response_model=InvoiceOut)
 def create_invoice(
     data: InvoiceCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin", "treasurer")),
+    user: CurrentUser = Depends(require_role("admin", "treasurer")),
 ):
     society_id = data.society_id or user.society_id
     if not society_id:
@@ -67,33 +96,111 @@ def create_invoice(
         due_date=due_date_parsed,
         month=data.month,
         year=data.year,
+        status="pending",
+        late_fee=0.0,
     )
     db.add(invoice)
-    db.commit()
+    record_invoice_created(db, invoice)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        # PostgreSQL names the index; SQLite names the table and columns
+        if PERIOD_CONSTRAINT in str(e.orig) or "UNIQUE constraint failed: maintenance_invoices" in str(e.orig):
+            raise HTTPException(status_code=409, detail="Invoice already exists for this flat and month")
+        raise
     db.refresh(invoice)
     return invoice
 
 
+@router.post("/invoices/generate", response_model=InvoiceGenerateOut)
+def generate_monthly_invoices(
+    data: InvoiceGenerate,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(require_role("admin", "treasurer")),
+):
+    """Bill every flat in the society for one month. Safe to re-run."""
+    society_id = data.society_id or user.society_id
+    if not society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    try:
+        due_date_parsed = date.fromisoformat(data.due_date)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid due_date format. Use YYYY-MM-DD")
+    try:
+        result = generate_invoices(db, society_id, data.year, data.month, due_date_parsed, data.rule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    return result
+
+
+@router.post("/late-fees/run")
+def run_late_fees(user: CurrentUser = Depends(require_role("admin", "treasurer"))):
+    """Run the overdue and late-fee sweep now, for the caller's society only."""
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    return {"marked_overdue": run_late_fee_sweep(user.society_id)}
+
+
+@router.get("/late-fees/status")
+def late_fee_status(
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(require_role("admin", "treasurer")),
+):
+    run = db.query(JobRun).filter(JobRun.name == SWEEP_JOB_NAME).first()
+    return {
+        "last_run_at": run.last_run_at if run else None,
+        "last_marked_overdue": run.last_affected if run else 0,
+    }
+
+
 # --- Payments ---
-@router.get("/payments", response_model=list[PaymentOut])
+@router.get("/payments", response_model=Page[PaymentOut])
 def list_payments(
+    page: PageParams = Depends(page_params),
+    filters: ListFilters = Depends(list_filters),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
+    query = db.query(*payment_rows.columns(Payment)).join(MaintenanceInvoice)
     if user.role in ("admin", "treasurer") and user.society_id:
-        return db.query(Payment).join(MaintenanceInvoice).filter(
-            MaintenanceInvoice.society_id == user.society_id
-        ).order_by(Payment.payment_date.desc()).all()
-    return db.query(Payment).filter(Payment.user_id == user.id).order_by(Payment.payment_date.desc()).all()
+        query = query.filter(MaintenanceInvoice.society_id == user.society_id)
+    else:
+        query = query.filter(Payment.user_id == user.id)
+    query = apply_filters(query, filters, date_column=Payment.payment_date, flat_column=MaintenanceInvoice.flat_id)
+    return payment_rows.page_response(paginate(query, page, Payment.payment_date, Payment.id))
+
+
+@router.get("/payments/export")
+def export_payments(
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    filters: ListFilters = Depends(list_filters),
+    user: CurrentUser = Depends(require_role("admin", "treasurer")),
+):
+    """Stream every matching payment of the society as CSV or XLSX."""
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    stmt = select(
+        Payment.id, Payment.invoice_id, Flat.flat_number.label("flat"), MaintenanceInvoice.month,
+        MaintenanceInvoice.year, Payment.amount, Payment.payment_method, Payment.transaction_id,
+        Payment.user_id, Payment.payment_date,
+    ).join(MaintenanceInvoice, Payment.invoice_id == MaintenanceInvoice.id).join(
+        Flat, MaintenanceInvoice.flat_id == Flat.id
+    ).where(MaintenanceInvoice.society_id == user.society_id)
+    stmt = apply_filters(stmt, filters, date_column=Payment.payment_date, flat_column=MaintenanceInvoice.flat_id)
+    return export_response(stmt.order_by(Payment.id), fmt, "payments")
 
 
 @router.post("/payments", response_model=PaymentOut)
 def record_payment(
     data: PaymentCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    invoice = db.query(MaintenanceInvoice).filter(MaintenanceInvoice.id == data.invoice_id).first()
+    invoice = db.query(MaintenanceInvoice).filter(
+        MaintenanceInvoice.id == data.invoice_id
+    ).with_for_update().first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     if invoice.status == "paid":
@@ -106,6 +213,7 @@ def record_payment(
         transaction_id=data.transaction_id,
     )
     db.add(payment)
+    record_invoice_paid(db, invoice, invoice.status, data.amount)
     invoice.status = "paid"
     db.commit()
     db.refresh(payment)
@@ -1,32 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.notice import Notice
-from app.models.user import User
-from app.schemas.schemas import NoticeCreate, NoticeOut
-from app.auth.deps import get_current_user, require_role
+from app.database import ReadSession, get_db, get_read_db
+from app.models.notice import Notice, notice_search
+from app.schemas.schemas import NoticeCreate, NoticeOut, NoticeListOut, Page
+from app.auth.deps import CurrentUser, get_current_user, require_role
+from app.config import get_settings
+from app.pagination import ListFilters, PageParams, apply_filters, empty_page, list_filters, page_params, paginate_async
+from app.responses import RowSerializer, text_preview
 
 router = APIRouter()
+settings = get_settings()
+notice_rows = RowSerializer(NoticeListOut, content_truncated=bool)
 
 
-@router.get("/", response_model=list[NoticeOut])
-def list_notices(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+@router.get("/", response_model=Page[NoticeListOut])
+async def list_notices(
+    page: PageParams = Depends(page_params),
+    filters: ListFilters = Depends(list_filters),
+    db: ReadSession = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    if not user.society_id:
+        return empty_page()
+    stmt = select(*notice_rows.columns(
+        Notice, **text_preview(Notice.content, settings.LIST_PREVIEW_CHARS)
+    )).where(
+        Notice.society_id == user.society_id,
+        Notice.is_active == True
+    )
+    stmt = apply_filters(stmt, filters, date_column=Notice.created_at)
+    page = await paginate_async(db, stmt, page, Notice.created_at, Notice.id, rows=True)
+    return notice_rows.page_response(page)
+
+
+@router.get("/search", response_model=Page[NoticeListOut])
+async def search_notices(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: PageParams = Depends(page_params),
+    db: ReadSession = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    if user.society_id:
-        return db.query(Notice).filter(
-            Notice.society_id == user.society_id,
-            Notice.is_active == True
-        ).order_by(Notice.created_at.desc()).all()
-    return []
+    """Active notices whose title or content match ``q``, best match first."""
+    if not user.society_id:
+        return empty_page()
+    stmt = select(*notice_rows.columns(
+        Notice, **text_preview(Notice.content, settings.LIST_PREVIEW_CHARS)
+    )).where(
+        Notice.society_id == user.society_id,
+        Notice.is_active == True
+    )
+    result = await db.execute(notice_search.apply(stmt, q, page, db.dialect_name))
+    return notice_rows.page_response(notice_search.page(result.all(), page))
+
+
+@router.get("/{notice_id}", response_model=NoticeOut)
+def get_notice(notice_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    notice = db.query(Notice).filter(
+        Notice.id == notice_id,
+        Notice.society_id == user.society_id,
+        Notice.is_active == True
+    ).first()
+    if not notice:
+        raise HTTPException(status_code=404, detail="Notice not found")
+    return notice
 
 
 @router.post("/", response_model=NoticeOut)
 def create_notice(
     data: NoticeCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     society_id = data.society_id or user.society_id
     if not society_id:
@@ -48,7 +92,7 @@ def create_notice(
 def delete_notice(
     notice_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     notice = db.query(Notice).filter(Notice.id == notice_id).first()
     if not notice:
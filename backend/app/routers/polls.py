@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from app.database import get_db
 from app.models.poll import Poll, Vote
-from app.models.user import User
 from app.schemas.schemas import PollCreate, PollOut, VoteCreate, VoteOut
-from app.auth.deps import get_current_user, require_role
+from app.auth.deps import CurrentUser, get_current_user, require_role
 
 router = APIRouter()
 
@@ -12,7 +12,7 @@ router = APIRouter()
 @router.get("/", response_model=list[PollOut])
 def list_polls(
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     if not user.society_id:
         return []
@@ -21,16 +21,23 @@ def list_polls(
         Poll.is_active == True
     ).order_by(Poll.created_at.desc()).all()
 
+    # Tally every listed poll in one grouped query, plus the user's own votes
+    poll_ids = [poll.id for poll in polls]
+    tallies: dict[int, dict[int, int]] = {}
+    user_votes: dict[int, int] = {}
+    if poll_ids:
+        for poll_id, option_index, count in db.query(
+            Vote.poll_id, Vote.option_index, func.count(Vote.id)
+        ).filter(Vote.poll_id.in_(poll_ids)).group_by(Vote.poll_id, Vote.option_index).all():
+            tallies.setdefault(poll_id, {})[option_index] = count
+        user_votes = dict(db.query(Vote.poll_id, Vote.option_index).filter(
+            Vote.poll_id.in_(poll_ids), Vote.user_id == user.id
+        ).all())
+
     result = []
     for poll in polls:
-        votes = db.query(Vote).filter(Vote.poll_id == poll.id).all()
-        vote_counts = [0] * len(poll.options)
-        user_voted = None
-        for v in votes:
-            if v.option_index < len(vote_counts):
-                vote_counts[v.option_index] += 1
-            if v.user_id == user.id:
-                user_voted = v.option_index
+        poll_tally = tallies.get(poll.id, {})
+        vote_counts = [poll_tally.get(i, 0) for i in range(len(poll.options))]
         result.append(PollOut(
             id=poll.id,
             society_id=poll.society_id,
@@ -41,8 +48,8 @@ def list_polls(
             expires_at=poll.expires_at,
             created_at=poll.created_at,
             vote_counts=vote_counts,
-            total_votes=len(votes),
-            user_voted=user_voted,
+            total_votes=sum(poll_tally.values()),
+            user_voted=user_votes.get(poll.id),
         ))
     return result
 
@@ -51,7 +58,7 @@ def list_polls(
 def create_poll(
     data: PollCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     society_id = data.society_id or user.society_id
     if not society_id:
@@ -83,7 +90,7 @@ def cast_vote(
     poll_id: int,
     data: VoteCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     poll = db.query(Poll).filter(Poll.id == poll_id, Poll.is_active == True).first()
     if not poll:
@@ -3,27 +3,34 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from app.database import get_db
 from app.models.user import User
-from app.schemas.schemas import UserOut, UserUpdate
-from app.auth.deps import get_current_user, require_role
+from app.schemas.schemas import UserOut, UserUpdate, Page
+from app.auth.deps import CurrentUser, get_current_user, invalidate_user, require_role
+from app.pagination import ListFilters, PageParams, apply_filters, empty_page, list_filters, page_params, paginate
+from app.responses import RowSerializer
 
 router = APIRouter()
+user_rows = RowSerializer(UserOut)
 
 
-@router.get("/", response_model=list[UserOut])
+@router.get("/", response_model=Page[UserOut])
 def list_residents(
+    page: PageParams = Depends(page_params),
+    filters: ListFilters = Depends(list_filters),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
-    if user.role == "admin" and user.society_id:
-        return db.query(User).filter(
-            User.society_id == user.society_id,
-            User.role == "resident"
-        ).all()
-    return []
+    if user.role != "admin" or not user.society_id:
+        return empty_page()
+    query = db.query(*user_rows.columns(User)).filter(
+        User.society_id == user.society_id,
+        User.role == "resident"
+    )
+    query = apply_filters(query, filters, date_column=User.created_at, flat_column=User.flat_id)
+    return user_rows.page_response(paginate(query, page, User.created_at, User.id))
 
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_resident(user_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+def get_resident(user_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
     resident = db.query(User).filter(User.id == user_id).first()
     if not resident:
         raise HTTPException(status_code=404, detail="Resident not found")
@@ -35,7 +42,7 @@ def update_resident(
     user_id: int,
     data: UserUpdate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     resident = db.query(User).filter(User.id == user_id).first()
     if not resident:
@@ -44,6 +51,7 @@ def update_resident(
     for key, value in update_data.items():
         setattr(resident, key, value)
     db.commit()
+    invalidate_user(resident.id)
     db.refresh(resident)
     return resident
 
@@ -54,7 +62,7 @@ def assign_flat(
     flat_id: int,
     is_owner: bool = False,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     resident = db.query(User).filter(User.id == user_id).first()
     if not resident:
@@ -64,6 +72,7 @@ def assign_flat(
     resident.moved_in_at = datetime.now(timezone.utc)
     resident.moved_out_at = None
     db.commit()
+    invalidate_user(resident.id)
     db.refresh(resident)
     return resident
 
@@ -72,7 +81,7 @@ def assign_flat(
 def move_out(
     user_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     resident = db.query(User).filter(User.id == user_id).first()
     if not resident:
@@ -80,5 +89,6 @@ def move_out(
     resident.moved_out_at = datetime.now(timezone.utc)
     resident.flat_id = None
     db.commit()
+    invalidate_user(resident.id)
     db.refresh(resident)
     return resident
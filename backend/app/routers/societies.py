@@ -1,19 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import Society, Tower, Flat
 from app.schemas.schemas import (
-    SocietyCreate, SocietyOut, TowerCreate, TowerOut, FlatCreate, FlatOut
+    SocietyCreate, SocietyOut, TowerCreate, TowerOut, FlatCreate, FlatOut,
+    ProvisionRequest, ProvisionOut,
 )
-from app.auth.deps import get_current_user, require_role
+from app.responses import RowSerializer
+from app.services.provisioning import flats_from_csv, flats_from_layouts, provision
+from app.auth.deps import CurrentUser, get_current_user, invalidate_user, require_role
 from app.models.user import User
 
 router = APIRouter()
+flat_rows = RowSerializer(FlatOut)
 
 
 # --- Societies ---
 @router.get("/", response_model=list[SocietyOut])
-def list_societies(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+def list_societies(db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
     if user.role == "admin":
         return db.query(Society).all()
     if user.society_id:
@@ -25,7 +29,7 @@ def list_societies(db: Session = Depends(get_db), user: User = Depends(get_curre
 def create_society(
     data: SocietyCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     society = Society(**data.model_dump())
     db.add(society)
@@ -33,13 +37,14 @@ def create_society(
     db.refresh(society)
     # Assign admin to this society if not already assigned
     if not user.society_id:
-        user.society_id = society.id
+        db.query(User).filter(User.id == user.id).update({User.society_id: society.id})
         db.commit()
+        invalidate_user(user.id)
     return society
 
 
 @router.get("/{society_id}", response_model=SocietyOut)
-def get_society(society_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+def get_society(society_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
     society = db.query(Society).filter(Society.id == society_id).first()
     if not society:
         raise HTTPException(status_code=404, detail="Society not found")
@@ -48,7 +53,7 @@ def get_society(society_id: int, db: Session = Depends(get_db), user: User = Dep
 
 # --- Towers ---
 @router.get("/{society_id}/towers", response_model=list[TowerOut])
-def list_towers(society_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+def list_towers(society_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
     return db.query(Tower).filter(Tower.society_id == society_id).all()
 
 
@@ -56,7 +61,7 @@ def list_towers(society_id: int, db: Session = Depends(get_db), user: User = Dep
 def create_tower(
     data: TowerCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     tower = Tower(**data.model_dump())
     db.add(tower)
@@ -67,18 +72,64 @@ def create_tower(
 
 # --- Flats ---
 @router.get("/towers/{tower_id}/flats", response_model=list[FlatOut])
-def list_flats(tower_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return db.query(Flat).filter(Flat.tower_id == tower_id).all()
+def list_flats(tower_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    return flat_rows.list_response(db.query(*flat_rows.columns(Flat)).filter(Flat.tower_id == tower_id))
 
 
 @router.post("/flats", response_model=FlatOut)
 def create_flat(
     data: FlatCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(require_role("admin")),
+    user: CurrentUser = Depends(require_role("admin")),
 ):
     flat = Flat(**data.model_dump())
     db.add(flat)
     db.commit()
     db.refresh(flat)
     return flat
+
+
+# --- Bulk provisioning ---
+def _provision(db: Session, society_id: int, towers: dict, flats: list, reuse_towers: bool) -> dict:
+    if not db.query(Society.id).filter(Society.id == society_id).first():
+        raise HTTPException(status_code=404, detail="Society not found")
+    try:
+        result = provision(db, society_id, towers, flats, reuse_towers=reuse_towers)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    return result
+
+
+@router.post("/{society_id}/provision", response_model=ProvisionOut)
+def provision_layout(
+    society_id: int,
+    data: ProvisionRequest,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(require_role("admin")),
+):
+    """Create towers and all their flats from floor/unit layout specs."""
+    try:
+        towers, flats = flats_from_layouts(data.towers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _provision(db, society_id, towers, flats, reuse_towers=False)
+
+
+@router.post("/{society_id}/provision/csv", response_model=ProvisionOut)
+def provision_csv(
+    society_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(require_role("admin")),
+):
+    """Create flats from a CSV (tower, flat_number, floor, flat_type, area_sqft).
+
+    Towers that do not exist yet are created; existing ones are reused.
+    """
+    try:
+        towers, flats = flats_from_csv(file.file.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _provision(db, society_id, towers, flats, reuse_towers=True)
@@ -1,36 +1,252 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
-from app.database import get_db
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Literal
+from app.database import ReadSession, get_db, get_read_db
+from app.models.flat import Flat
+from app.models.tower import Tower
 from app.models.visitor import Visitor
-from app.models.user import User
-from app.schemas.schemas import VisitorCreate, VisitorUpdate, VisitorOut
-from app.auth.deps import get_current_user, require_role
+from app.schemas.schemas import (
+    InsideVisitorOut, OccupancyOut, VisitorCreate, VisitorUpdate, VisitorOut, Page,
+    VisitorPassCreate, VisitorPassOut, VisitorPassVerify,
+)
+from app.responses import RowsResponse, RowSerializer
+from app.auth.deps import CurrentUser, authenticate_token, get_current_user, oauth2_scheme, require_role
+from app.config import get_settings
+from app.pagination import ListFilters, PageParams, apply_filters, empty_page, list_filters, page_params, paginate_async
+from app.services.events import OVERFLOW, get_event_broker
+from app.services.exports import export_response
+from app.services.visitor_archive import read_archive, retention_cutoff
+from app.services.visitor_index import visitor_index
+from app.services.visitor_passes import VisitorPass, new_pass_id, sign_pass, verify_pass
 
 router = APIRouter()
+settings = get_settings()
+visitor_rows = RowSerializer(VisitorOut)
 
+# Roles that see every visitor of their society rather than their own flat's
+GATE_ROLES = ("admin", "security")
 
-@router.get("/", response_model=list[VisitorOut])
-def list_visitors(
+
+@router.get("/", response_model=Page[VisitorOut])
+async def list_visitors(
+    page: PageParams = Depends(page_params),
+    filters: ListFilters = Depends(list_filters),
+    db: ReadSession = Depends(get_read_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    stmt = select(*visitor_rows.columns(Visitor))
+    if user.role in GATE_ROLES and user.society_id:
+        stmt = stmt.where(Visitor.society_id == user.society_id)
+    elif user.flat_id:
+        stmt = stmt.where(Visitor.flat_id == user.flat_id)
+    else:
+        return empty_page()
+    if filters.date_from is None:
+        # Keep to the retention window (the recent partitions); older visits are in /archive
+        stmt = stmt.where(Visitor.created_at >= retention_cutoff())
+    stmt = apply_filters(
+        stmt, filters,
+        status_column=Visitor.status,
+        date_column=Visitor.created_at,
+        flat_column=Visitor.flat_id,
+    )
+    page = await paginate_async(db, stmt, page, Visitor.created_at, Visitor.id, rows=True)
+    return visitor_rows.page_response(page)
+
+
+@router.get("/export")
+def export_visitors(
+    fmt: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    filters: ListFilters = Depends(list_filters),
+    user: CurrentUser = Depends(require_role("admin", "security")),
+):
+    """Stream the society's visitor log as CSV or XLSX."""
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    stmt = select(
+        Visitor.id, Flat.flat_number.label("flat"), Visitor.visitor_name, Visitor.visitor_phone,
+        Visitor.purpose, Visitor.vehicle_number, Visitor.status, Visitor.entry_time, Visitor.exit_time,
+        Visitor.approved_by,
+    ).join(Flat, Visitor.flat_id == Flat.id).where(Visitor.society_id == user.society_id)
+    stmt = apply_filters(
+        stmt, filters, status_column=Visitor.status, date_column=Visitor.created_at, flat_column=Visitor.flat_id,
+    )
+    return export_response(stmt.order_by(Visitor.id), fmt, "visitors")
+
+
+@router.get("/archive", response_model=Page[VisitorOut])
+def archived_visitors(
+    date_from: date,
+    date_to: date,
+    flat_id: int | None = None,
+    status: str | None = None,
+    page: PageParams = Depends(page_params),
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Archived visitors created between two dates, newest first and paged;
+    at most a year per request."""
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    if user.role not in GATE_ROLES:
+        if not user.flat_id:
+            return RowsResponse(empty_page())
+        flat_id = user.flat_id
+    try:
+        archived = read_archive(db, user.society_id, date_from, date_to, page, flat_id=flat_id, status=status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RowsResponse(archived)
+
+
+def _require_index():
+    if not visitor_index.ready:
+        raise HTTPException(status_code=503, detail="Visitor index is loading, try again shortly")
+
+
+@router.get("/inside", response_model=OccupancyOut)
+def visitors_inside(
+    tower_id: int | None = None,
+    flat_id: int | None = None,
+    user: CurrentUser = Depends(require_role(*GATE_ROLES)),
+):
+    """Pending and approved visitors of the society, a tower or a flat, from memory."""
+    _require_index()
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    if flat_id is not None:
+        visitors = visitor_index.in_flat(user.society_id, flat_id)
+    elif tower_id is not None:
+        visitors = visitor_index.in_tower(user.society_id, tower_id)
+    else:
+        visitors = visitor_index.in_society(user.society_id)
+    return RowsResponse({"count": len(visitors), "visitors": visitors})
+
+
+@router.get("/inside/vehicles/{plate}", response_model=list[InsideVisitorOut])
+def vehicle_inside(plate: str, user: CurrentUser = Depends(require_role(*GATE_ROLES))):
+    """Visitors inside with this vehicle; spacing, dashes and case are ignored."""
+    _require_index()
+    if not user.society_id:
+        raise HTTPException(status_code=400, detail="Society ID required")
+    return RowsResponse(visitor_index.with_vehicle(user.society_id, plate))
+
+
+def _can_watch(user: CurrentUser) -> bool:
+    return bool(user.society_id) and (user.role in GATE_ROLES or user.flat_id is not None)
+
+
+async def _events_for(user: CurrentUser, token: str) -> AsyncIterator[bytes | None]:
+    """Encoded visitor events ``user`` may see, and ``None`` every heartbeat.
+
+    Ends when the subscriber falls behind, or when its token or scope (role,
+    flat) changes, which is re-checked every heartbeat.
+    """
+    loop = asyncio.get_running_loop()
+    async with get_event_broker().subscribe(user.society_id) as queue:
+        next_check = loop.time() + settings.EVENT_HEARTBEAT_SECONDS
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), max(0, next_check - loop.time()))
+            except asyncio.TimeoutError:
+                try:
+                    if await run_in_threadpool(authenticate_token, token) != user:
+                        return
+                except HTTPException:
+                    return
+                next_check = loop.time() + settings.EVENT_HEARTBEAT_SECONDS
+                yield None
+                continue
+            if item is OVERFLOW:
+                return
+            flat_id, data = item
+            if user.role in GATE_ROLES or flat_id == user.flat_id:
+                yield data
+
+
+async def _sse(user: CurrentUser, token: str) -> AsyncIterator[bytes]:
+    yield b"retry: 3000\n\n"
+    async for data in _events_for(user, token):
+        yield b": ping\n\n" if data is None else b"data: " + data + b"\n\n"
+
+
+@router.get("/events")
+async def visitor_events(
+    token: str | None = Query(None, description="Bearer token, for EventSource clients that cannot send headers"),
+    bearer: str | None = Depends(oauth2_scheme),
 ):
-    if user.role in ("admin", "security") and user.society_id:
-        return db.query(Visitor).filter(
-            Visitor.society_id == user.society_id
-        ).order_by(Visitor.created_at.desc()).limit(100).all()
-    if user.flat_id:
-        return db.query(Visitor).filter(
-            Visitor.flat_id == user.flat_id
-        ).order_by(Visitor.created_at.desc()).all()
-    return []
+    """Server-sent events for visitor arrivals, approvals and checkouts.
+
+    Each event is a visitor as in the list, plus a ``type`` of
+    ``visitor.created``, ``visitor.approved`` or ``visitor.checked_out``.
+    When the stream ends, reconnect and reload the list.
+    """
+    token = bearer or token
+    user = await run_in_threadpool(authenticate_token, token)
+    if not _can_watch(user):
+        raise HTTPException(status_code=403, detail="No visitor events for this account")
+    return StreamingResponse(
+        _sse(user, token),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def visitor_socket(websocket: WebSocket, token: str | None = Query(None)):
+    """The events of ``/events`` over a WebSocket, one JSON text message each."""
+    try:
+        user = await run_in_threadpool(authenticate_token, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not _can_watch(user):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    async def forward():
+        async for data in _events_for(user, token):
+            if data is not None:
+                await websocket.send_text(data.decode())
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+    sender = asyncio.create_task(forward())
+    try:
+        # Clients send nothing; receiving is how a disconnect is noticed
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+
+
+def _publish(event_type: str, visitor: Visitor):
+    state = VisitorOut.model_validate(visitor).model_dump(mode="json")
+    state["tower_id"] = visitor.flat.tower_id if visitor.flat else None
+    _publish_state(event_type, state)
+
+
+def _publish_state(event_type: str, state: dict):
+    """Update this worker's index right away, then tell every worker and client.
+
+    ``state`` is a visitor's ``VisitorOut`` JSON plus its ``tower_id``.
+    """
+    visitor_index.apply(state)
+    get_event_broker().publish(state["society_id"], {"type": event_type, **state})
 
 
 @router.post("/", response_model=VisitorOut)
 def add_visitor(
     data: VisitorCreate,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     society_id = data.society_id or user.society_id
     if not society_id:
@@ -46,6 +262,91 @@ def add_visitor(
     db.add(visitor)
     db.commit()
     db.refresh(visitor)
+    _publish("visitor.created", visitor)
+    return visitor
+
+
+@router.post("/passes", response_model=VisitorPassOut)
+def issue_visitor_pass(
+    data: VisitorPassCreate,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Issue a signed, pre-approved pass for an expected visitor."""
+    flat_id = (data.flat_id or user.flat_id) if user.role == "admin" else user.flat_id
+    if not user.society_id or not flat_id:
+        raise HTTPException(status_code=400, detail="Flat ID required")
+    if data.valid_hours > settings.VISITOR_PASS_MAX_HOURS:
+        raise HTTPException(
+            status_code=400, detail=f"Passes are valid for at most {settings.VISITOR_PASS_MAX_HOURS} hours",
+        )
+    flat = db.query(Flat.tower_id).join(Tower, Flat.tower_id == Tower.id).filter(
+        Flat.id == flat_id, Tower.society_id == user.society_id
+    ).first()
+    if flat is None:
+        raise HTTPException(status_code=404, detail="Flat not found")
+
+    valid_from = data.valid_from or datetime.now(timezone.utc)
+    if valid_from.tzinfo is None:
+        valid_from = valid_from.replace(tzinfo=timezone.utc)
+    start = int(valid_from.timestamp())
+    visitor_pass = VisitorPass(
+        pass_id=new_pass_id(),
+        society_id=user.society_id,
+        flat_id=flat_id,
+        tower_id=flat.tower_id,
+        issued_by=user.id,
+        valid_from=start,
+        valid_until=start + data.valid_hours * 3600,
+        visitor_name=data.visitor_name,
+        visitor_phone=data.visitor_phone,
+        purpose=data.purpose,
+        vehicle_number=data.vehicle_number,
+    )
+    return VisitorPassOut(
+        pass_id=visitor_pass.pass_id,
+        code=sign_pass(visitor_pass),
+        flat_id=flat_id,
+        visitor_name=data.visitor_name,
+        valid_from=datetime.fromtimestamp(visitor_pass.valid_from, timezone.utc),
+        valid_until=datetime.fromtimestamp(visitor_pass.valid_until, timezone.utc),
+    )
+
+
+@router.post("/passes/verify", response_model=VisitorOut)
+def check_in_with_pass(
+    data: VisitorPassVerify,
+    db: Session = Depends(get_db),
+    user: CurrentUser = Depends(require_role(*GATE_ROLES)),
+):
+    """Check a pass holder in: the signature is checked in memory and the
+    entry recorded, already approved, with a single insert."""
+    try:
+        visitor_pass = verify_pass(data.code)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if visitor_pass.society_id != user.society_id:
+        raise HTTPException(status_code=403, detail="Pass is for another society")
+    # A pass may be used again within its window, but not while its holder is inside
+    if visitor_index.ready and visitor_index.with_pass(user.society_id, visitor_pass.pass_id):
+        raise HTTPException(status_code=409, detail="Visitor with this pass is already inside")
+
+    row = db.execute(
+        insert(Visitor).values(
+            society_id=visitor_pass.society_id,
+            flat_id=visitor_pass.flat_id,
+            visitor_name=visitor_pass.visitor_name,
+            visitor_phone=visitor_pass.visitor_phone,
+            purpose=visitor_pass.purpose,
+            vehicle_number=visitor_pass.vehicle_number,
+            status="approved",
+            approved_by=visitor_pass.issued_by,
+            pass_id=visitor_pass.pass_id,
+        ).returning(*visitor_rows.columns(Visitor))
+    ).one()
+    db.commit()
+    visitor = VisitorOut.model_validate(dict(row._mapping))
+    _publish_state("visitor.created", {**visitor.model_dump(mode="json"), "tower_id": visitor_pass.tower_id})
     return visitor
 
 
@@ -53,7 +354,7 @@ def add_visitor(
 def approve_visitor(
     visitor_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     visitor = db.query(Visitor).filter(Visitor.id == visitor_id).first()
     if not visitor:
@@ -62,6 +363,7 @@ def approve_visitor(
     visitor.approved_by = user.id
     db.commit()
     db.refresh(visitor)
+    _publish("visitor.approved", visitor)
     return visitor
 
 
@@ -69,7 +371,7 @@ def approve_visitor(
 def checkout_visitor(
     visitor_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ):
     visitor = db.query(Visitor).filter(Visitor.id == visitor_id).first()
     if not visitor:
@@ -78,4 +380,5 @@ def checkout_visitor(
     visitor.exit_time = datetime.now(timezone.utc)
     db.commit()
     db.refresh(visitor)
+    _publish("visitor.checked_out", visitor)
     return visitor
@@ -1,6 +1,22 @@
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, field_serializer
 from datetime import datetime, date, time
-from typing import Any
+from typing import Annotated, Any, Generic, Literal, TypeVar
+
+T = TypeVar("T")
+
+
+def format_date(v: date | None) -> str:
+    return v.isoformat() if v else ""
+
+
+def format_hhmm(v: time | None) -> str:
+    return v.strftime("%H:%M") if v else ""
+
+
+# --- Pagination ---
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
 
 
 # --- Auth Schemas ---
@@ -117,6 +133,29 @@ class FlatOut(FlatBase):
         from_attributes = True
 
 
+# --- Bulk Provisioning Schemas ---
+class UnitSpec(BaseModel):
+    flat_type: str | None = None
+    area_sqft: float | None = None
+
+class TowerLayout(BaseModel):
+    name: str
+    floors: int = Field(ge=1, le=200)
+    units_per_floor: int = Field(ge=1, le=100)
+    start_floor: int = 1
+    # Placeholders: {tower}, {floor}, {unit}; e.g. "A-{floor}{unit:02d}" gives A-101
+    numbering: str = Field("{floor}{unit:02d}", max_length=50)
+    # One entry for every unit, or one per position on a floor
+    units: list[UnitSpec] = []
+
+class ProvisionRequest(BaseModel):
+    towers: list[TowerLayout] = Field(min_length=1)
+
+class ProvisionOut(BaseModel):
+    towers_created: int
+    flats_created: int
+
+
 # --- Maintenance Invoice Schemas ---
 class InvoiceBase(BaseModel):
     flat_id: int
@@ -128,6 +167,28 @@ class InvoiceBase(BaseModel):
 class InvoiceCreate(InvoiceBase):
     society_id: int | None = None
 
+class RateRule(BaseModel):
+    kind: Literal["flat", "per_sqft", "by_type"]
+    # Flat rate for "flat"; for the others, the amount for flats without an
+    # area or a listed type (such flats are skipped when it is not set)
+    amount: float | None = Field(default=None, ge=0)
+    rate_per_sqft: float | None = Field(default=None, ge=0)
+    type_rates: dict[str, Annotated[float, Field(ge=0)]] = {}
+
+
+class InvoiceGenerate(BaseModel):
+    month: int = Field(ge=1, le=12)
+    year: int
+    due_date: str
+    rule: RateRule
+    society_id: int | None = None
+
+class InvoiceGenerateOut(BaseModel):
+    created: int
+    skipped_existing: int
+    skipped_unpriced: int
+    total_amount: float
+
 class InvoiceOut(BaseModel):
     id: int
     society_id: int
@@ -143,7 +204,7 @@ class InvoiceOut(BaseModel):
 
     @field_serializer("due_date")
     def serialize_due_date(self, v: date) -> str:
-        return v.isoformat() if v else ""
+        return format_date(v)
 
     class Config:
         from_attributes = True
@@ -201,6 +262,9 @@ class ComplaintOut(BaseModel):
     class Config:
         from_attributes = True
 
+class ComplaintListOut(ComplaintOut):
+    description_truncated: bool = False  # fetch the complaint for the full text
+
 
 # --- Visitor Schemas ---
 class VisitorBase(BaseModel):
@@ -228,11 +292,35 @@ class VisitorOut(BaseModel):
     exit_time: datetime | None = None
     status: str
     approved_by: int | None = None
+    pass_id: str | None = None
     created_at: datetime | None = None
 
     class Config:
         from_attributes = True
 
+class InsideVisitorOut(VisitorOut):
+    tower_id: int | None = None
+
+class OccupancyOut(BaseModel):
+    count: int
+    visitors: list[InsideVisitorOut]
+
+class VisitorPassCreate(VisitorBase):
+    flat_id: int | None = None  # admins issue passes for any flat; residents for their own
+    valid_from: datetime | None = None
+    valid_hours: int = Field(24, ge=1)
+
+class VisitorPassOut(BaseModel):
+    pass_id: str
+    code: str  # signed pass; show as a QR code or share as text
+    flat_id: int
+    visitor_name: str
+    valid_from: datetime
+    valid_until: datetime
+
+class VisitorPassVerify(BaseModel):
+    code: str
+
 
 # --- Notice Schemas ---
 class NoticeBase(BaseModel):
@@ -256,6 +344,9 @@ class NoticeOut(BaseModel):
     class Config:
         from_attributes = True
 
+class NoticeListOut(NoticeOut):
+    content_truncated: bool = False  # fetch the notice for the full text
+
 
 # --- Booking Schemas ---
 class BookingBase(BaseModel):
@@ -280,20 +371,37 @@ class BookingOut(BaseModel):
 
     @field_serializer("booking_date")
     def serialize_booking_date(self, v: date) -> str:
-        return v.isoformat() if v else ""
+        return format_date(v)
 
     @field_serializer("start_time")
     def serialize_start_time(self, v: time) -> str:
-        return v.strftime("%H:%M") if v else ""
+        return format_hhmm(v)
 
     @field_serializer("end_time")
     def serialize_end_time(self, v: time) -> str:
-        return v.strftime("%H:%M") if v else ""
+        return format_hhmm(v)
 
     class Config:
         from_attributes = True
 
 
+class TimeInterval(BaseModel):
+    start: str  # HH:MM
+    end: str    # HH:MM
+
+class DayAvailability(BaseModel):
+    day: date
+    busy: list[TimeInterval]
+    free: list[TimeInterval]
+
+class AvailabilityOut(BaseModel):
+    facility: str
+    slot_minutes: int
+    open_time: str
+    close_time: str
+    days: list[DayAvailability]
+
+
 # --- Poll Schemas ---
 class PollBase(BaseModel):
     question: str
@@ -0,0 +1,107 @@
+"""Full-text search over a table's text columns.
+
+On PostgreSQL a table gets a generated, weighted ``search_vector`` tsvector
+column with a GIN index, so the database keeps it current on every write.
+On SQLite (test databases) an external-content FTS5 table mirrors the
+columns through triggers. Migration 009 sets both up; ``create_all`` does
+too, through the DDL events registered here.
+
+Results are ranked, best first, and paged with an opaque offset cursor.
+"""
+import base64
+import binascii
+import re
+import sqlalchemy as sa
+from sqlalchemy import DDL, Table, event, func, literal_column
+from fastapi import HTTPException
+
+TS_CONFIG = "english"
+_BM25_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 2.0, "D": 1.0}
+_WORD = re.compile(r"\w+")
+
+
+def _encode_offset(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o{offset}".encode()).decode().rstrip("=")
+
+
+def _decode_offset(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        if not raw.startswith("o"):
+            raise ValueError(raw)
+        return max(int(raw[1:]), 0)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class SearchIndex:
+    """Search over ``table``'s columns, each with a weight from ``"A"``
+    (ranks highest) to ``"D"``."""
+
+    def __init__(self, table: Table, **weights: str):
+        self.table = table
+        self.weights = weights
+        self.fts_table = f"{table.name}_fts"
+        for dialect in ("postgresql", "sqlite"):
+            for statement in self._ddl(dialect):
+                event.listen(table, "after_create", DDL(statement).execute_if(dialect=dialect))
+
+    def _ddl(self, dialect: str) -> list[str]:
+        """Statements that add the index to a new table."""
+        name, columns = self.table.name, list(self.weights)
+        if dialect == "postgresql":
+            vector = " || ".join(
+                f"setweight(to_tsvector('{TS_CONFIG}'::regconfig, coalesce({column}, '')), '{weight}')"
+                for column, weight in self.weights.items()
+            )
+            return [
+                f"ALTER TABLE {name} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED",
+                f"CREATE INDEX ix_{name}_search ON {name} USING gin (search_vector)",
+            ]
+        if dialect == "sqlite":
+            fts, listed = self.fts_table, ", ".join(columns)
+            new = ", ".join(f"new.{column}" for column in columns)
+            old = ", ".join(f"old.{column}" for column in columns)
+            remove = f"INSERT INTO {fts}({fts}, rowid, {listed}) VALUES ('delete', old.id, {old});"
+            add = f"INSERT INTO {fts}(rowid, {listed}) VALUES (new.id, {new});"
+            return [
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({listed}, content='{name}', content_rowid='id', "
+                f"tokenize='porter unicode61')",
+                f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {name} BEGIN {add} END",
+                f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {name} BEGIN {remove} END",
+                f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {listed} ON {name} BEGIN {remove} {add} END",
+            ]
+        return []
+
+    def apply(self, query, text: str, page, dialect_name: str):
+        """Restrict a Query or Select on the table to rows matching ``text``,
+        best match first, and apply ``page``."""
+        words = _WORD.findall(text)
+        if not words:
+            raise HTTPException(status_code=400, detail="Search needs at least one word")
+        name = self.table.name
+        if dialect_name == "postgresql":
+            vector = literal_column(f"{name}.search_vector")
+            tsquery = func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), text)
+            query = query.filter(vector.op("@@")(tsquery))
+            rank = func.ts_rank_cd(vector, tsquery)
+        else:
+            fts = sa.table(self.fts_table, sa.column("rowid"))
+            fts_name = literal_column(self.fts_table)
+            # Quote every word so FTS5 query syntax in user input is taken literally
+            match = " ".join(f'"{word}"' for word in words)
+            query = query.join(fts, fts.c.rowid == self.table.c.id).filter(fts_name.op("MATCH")(match))
+            # bm25 is lower for better matches
+            rank = -func.bm25(fts_name, *[_BM25_WEIGHTS[weight] for weight in self.weights.values()])
+        offset = _decode_offset(page.cursor) if page.cursor else 0
+        return query.order_by(rank.desc(), self.table.c.id.desc()).offset(offset).limit(page.limit + 1)
+
+    @staticmethod
+    def page(rows: list, page) -> dict:
+        """``{"items", "next_cursor"}`` for rows fetched after ``apply``."""
+        offset = _decode_offset(page.cursor) if page.cursor else 0
+        next_cursor = None
+        if len(rows) > page.limit:
+            rows = rows[:page.limit]
+            next_cursor = _encode_offset(offset + page.limit)
+        return {"items": rows, "next_cursor": next_cursor}
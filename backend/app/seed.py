@@ -1,6 +1,5 @@
 """Seed data script for Nestify development — rich showcase data."""
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from datetime import date, datetime, time, timezone, timedelta
 from app.database import SessionLocal, engine, Base
 from app.models import (
@@ -8,8 +7,8 @@ from app.models import (
     MaintenanceInvoice, Payment, Complaint,
     Visitor, Notice, Booking, Poll, Vote,
 )
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.finance import rebuild_society_finance
+from app.auth.passwords import pwd_context
 
 
 def seed():
@@ -366,6 +365,10 @@ def seed():
         ]
         db.add_all(poll1_votes + poll2_votes + poll3_votes)
 
+        # =================== FINANCE ROLLUP ===================
+        db.flush()
+        rebuild_society_finance(db)
+
         db.commit()
         print("[SEED] Comprehensive showcase data created successfully!")
         print("[SEED] ==========================================")
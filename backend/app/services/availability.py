@@ -0,0 +1,106 @@
+"""Free/busy computation for facility bookings.
+
+Busy intervals for a (society, facility, day) are merged once and cached;
+create_booking and cancel_booking invalidate the affected day. A short TTL
+bounds staleness when several workers each hold their own cache.
+"""
+import re
+from datetime import date, time, timedelta
+from sqlalchemy.orm import Session
+from app.cache import TTLCache
+from app.config import get_settings
+from app.models.booking import Booking
+
+settings = get_settings()
+
+Interval = tuple[int, int]  # minutes since midnight, [start, end)
+
+_SLOT_RE = re.compile(r"^(\d+)\s*([mh]?)$")
+
+
+def parse_slot(slot: str) -> int:
+    """Parse a slot length such as ``30m``, ``1h`` or ``45`` into minutes."""
+    match = _SLOT_RE.match(slot.strip().lower())
+    if not match:
+        raise ValueError("Invalid slot. Use e.g. 30m or 1h")
+    minutes = int(match.group(1)) * (60 if match.group(2) == "h" else 1)
+    if not 5 <= minutes <= 24 * 60:
+        raise ValueError("Slot must be between 5m and 24h")
+    return minutes
+
+
+def to_minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def merge_intervals(intervals: list[Interval]) -> list[Interval]:
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_intervals(busy: list[Interval], open_at: int, close_at: int, slot: int) -> list[Interval]:
+    """Gaps between merged ``busy`` intervals, snapped inward to the slot grid."""
+    free: list[Interval] = []
+
+    def add_gap(start: int, end: int):
+        start = open_at + -(-(max(start, open_at) - open_at) // slot) * slot
+        end = open_at + (min(end, close_at) - open_at) // slot * slot
+        if end > start:
+            free.append((start, end))
+
+    cursor = open_at
+    for start, end in busy:
+        if start > cursor:
+            add_gap(cursor, start)
+        cursor = max(cursor, end)
+    add_gap(cursor, close_at)
+    return free
+
+
+# Keyed by (society_id, facility, day) -> merged busy intervals
+busy_cache = TTLCache(maxsize=4096, ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS)
+
+
+def invalidate_busy(society_id: int, facility: str, day: date):
+    busy_cache.pop((society_id, facility, day))
+
+
+def busy_by_day(db: Session, society_id: int, facility: str, start: date, end: date) -> dict[date, list[Interval]]:
+    """Merged busy intervals for every day in [start, end], cached per day."""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    result: dict[date, list[Interval]] = {}
+    missing = []
+    for day in days:
+        cached = busy_cache.get((society_id, facility, day))
+        if cached is None:
+            missing.append(day)
+        else:
+            result[day] = cached
+
+    if missing:
+        raw: dict[date, list[Interval]] = {day: [] for day in missing}
+        rows = db.query(Booking.booking_date, Booking.start_time, Booking.end_time).filter(
+            Booking.society_id == society_id,
+            Booking.facility_name == facility,
+            Booking.status == "confirmed",
+            Booking.booking_date >= missing[0],
+            Booking.booking_date <= missing[-1],
+        ).all()
+        for day, start_time, end_time in rows:
+            if day in raw:
+                raw[day].append((to_minutes(start_time), to_minutes(end_time)))
+        for day, intervals in raw.items():
+            merged = merge_intervals(intervals)
+            busy_cache.set((society_id, facility, day), merged)
+            result[day] = merged
+    return result
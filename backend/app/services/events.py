@@ -0,0 +1,200 @@
+"""Per-society visitor events for the gate and resident screens.
+
+Visitor write paths publish a compact event after they commit; every worker
+fans it out to the WebSocket and SSE clients connected to it. The ``memory``
+broker only reaches clients of the publishing process; use ``redis`` (any
+Redis-protocol server) when running more than one worker.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Callable
+import orjson
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "nestify:visitors:"
+
+# Replaces a subscriber's queued events once it falls behind or events may
+# have been missed; the connection is then closed and the client reloads
+# the list when it reconnects.
+OVERFLOW = None
+
+
+class EventBroker(ABC):
+    """Fan-out of JSON events to the subscribers of each society.
+
+    ``publish`` may be called from any thread (sync routes run in the
+    threadpool). Subscribers get ``(flat_id, data)`` tuples on a bounded
+    queue, where ``data`` is the encoded event and ``flat_id`` its
+    ``"flat_id"`` key, for filtering without decoding.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._listeners: list[Callable[[bytes | None], None]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        self._loop = None
+        # Ends open streams so they do not hold up shutdown
+        self._overflow_all()
+
+    def publish(self, society_id: int, event: dict) -> None:
+        """Queue ``event`` for delivery; a no-op until the broker is started."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        data = orjson.dumps(event, option=orjson.OPT_UTC_Z)
+        loop.call_soon_threadsafe(self._send, society_id, event.get("flat_id"), data)
+
+    def add_listener(self, listener: Callable[[bytes | None], None]) -> None:
+        """Call ``listener`` with every event this worker receives, on the
+        event loop, and with ``None`` when events may have been missed."""
+        self._listeners.append(listener)
+
+    def _notify(self, data: bytes | None) -> None:
+        for listener in self._listeners:
+            try:
+                listener(data)
+            except Exception:
+                logger.exception("Visitor event listener failed")
+
+    @abstractmethod
+    def _send(self, society_id: int, flat_id: int | None, data: bytes) -> None:
+        """Deliver an encoded event to every worker; runs on the event loop."""
+
+    def _fanout(self, society_id: int, flat_id: int | None, data: bytes) -> None:
+        self.published += 1
+        self._notify(data)
+        for queue in self._subscribers.get(society_id, ()):
+            try:
+                queue.put_nowait((flat_id, data))
+            except asyncio.QueueFull:
+                self.dropped += 1
+                self._overflow(queue)
+
+    @staticmethod
+    def _overflow(queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(OVERFLOW)
+
+    def _overflow_all(self) -> None:
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._overflow(queue)
+
+    @asynccontextmanager
+    async def subscribe(self, society_id: int) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers[society_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(society_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[society_id]
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+class MemoryEventBroker(EventBroker):
+    """In-process broker; events reach only this worker's clients."""
+
+    def _send(self, society_id: int, flat_id: int | None, data: bytes) -> None:
+        self._fanout(society_id, flat_id, data)
+
+
+class RedisEventBroker(EventBroker):
+    """Relays events through Redis pub/sub so every worker receives them."""
+
+    SUBSCRIBE_TIMEOUT_SECONDS = 5
+
+    def __init__(self, url: str, queue_size: int = 100):
+        import redis.asyncio as redis  # optional dependency, only needed for this backend
+
+        super().__init__(queue_size)
+        self._client = redis.Redis.from_url(url)
+        self._reader: asyncio.Task | None = None
+        self._subscribed = asyncio.Event()
+        self._lost = False  # events may have been missed until the next subscribe
+        self._pending: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        await super().start()
+        self._reader = asyncio.create_task(self._read())
+        # Listeners that load state at startup must not miss events published meanwhile
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), self.SUBSCRIBE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Visitor event subscription not ready; continuing without it")
+            self._lost = True
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        await self._client.aclose()
+
+    def _send(self, society_id: int, flat_id: int | None, data: bytes) -> None:
+        task = asyncio.create_task(self._client.publish(f"{CHANNEL_PREFIX}{society_id}", data))
+        self._pending.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Could not publish visitor event: %s", task.exception())
+
+    async def _read(self) -> None:
+        while True:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                self._subscribed.set()
+                if self._lost:
+                    # Events published while disconnected are gone; make clients reload
+                    self._overflow_all()
+                    self._notify(None)
+                    self._lost = False
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    society_id = int(message["channel"].rsplit(b":", 1)[1])
+                    data = message["data"]
+                    self._fanout(society_id, orjson.loads(data).get("flat_id"), data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Visitor event subscription lost, retrying: %s", exc)
+                self._lost = True
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+@lru_cache()
+def get_event_broker() -> EventBroker:
+    if settings.EVENT_BROKER == "redis":
+        return RedisEventBroker(settings.EVENT_BROKER_URL or "redis://localhost:6379/0", settings.EVENT_QUEUE_SIZE)
+    return MemoryEventBroker(settings.EVENT_QUEUE_SIZE)
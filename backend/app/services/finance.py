@@ -0,0 +1,143 @@
+"""Incremental maintenance of the society_monthly_finance rollup.
+
+Write paths call the ``record_*`` helpers inside their own transaction so the
+rollup commits (or rolls back) together with the invoice/payment change.
+``rebuild_society_finance`` recomputes everything from the raw tables:
+
+    python -m app.services.finance [society_id]
+"""
+import sys
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.finance import SocietyMonthlyFinance
+from app.models.maintenance import MaintenanceInvoice
+from app.models.payment import Payment
+
+ROLLUP_FIELDS = ("collected", "pending", "overdue", "late_fee", "pending_count", "overdue_count")
+
+
+def _upsert(db: Session, values: dict, deltas: dict):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    table = SocietyMonthlyFinance.__table__
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["society_id", "year", "month"],
+            set_={k: table.c[k] + v for k, v in deltas.items()} | {"updated_at": func.now()},
+        )
+        db.execute(stmt)
+        return
+
+    result = db.execute(
+        update(table)
+        .where(
+            table.c.society_id == values["society_id"],
+            table.c.year == values["year"],
+            table.c.month == values["month"],
+        )
+        .values({k: table.c[k] + v for k, v in deltas.items()})
+    )
+    if result.rowcount == 0:
+        db.execute(insert(table).values(**values))
+
+
+def apply_finance_delta(db: Session, society_id: int, year: int, month: int, **deltas):
+    """Add ``deltas`` (keyed by rollup column) to one (society, year, month) row."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    unknown = set(deltas) - set(ROLLUP_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown rollup fields: {', '.join(sorted(unknown))}")
+    values = {"society_id": society_id, "year": year, "month": month}
+    for field in ROLLUP_FIELDS:
+        values[field] = deltas.get(field, 0)
+    _upsert(db, values, deltas)
+
+
+def _status_deltas(status: str, total_amount: float, sign: int) -> dict:
+    if status == "pending":
+        return {"pending": sign * total_amount, "pending_count": sign}
+    if status == "overdue":
+        return {"overdue": sign * total_amount, "overdue_count": sign}
+    return {}
+
+
+def record_invoice_created(db: Session, invoice: MaintenanceInvoice):
+    apply_finance_delta(
+        db, invoice.society_id, invoice.year, invoice.month,
+        late_fee=invoice.late_fee or 0,
+        **_status_deltas(invoice.status or "pending", invoice.total_amount, 1),
+    )
+
+
+def record_invoice_paid(db: Session, invoice: MaintenanceInvoice, previous_status: str, amount: float):
+    """Move an invoice out of pending/overdue and book ``amount`` as collected."""
+    apply_finance_delta(
+        db, invoice.society_id, invoice.year, invoice.month,
+        collected=amount,
+        **_status_deltas(previous_status, invoice.total_amount, -1),
+    )
+
+
+def rebuild_society_finance(db: Session, society_id: int | None = None) -> int:
+    """Recompute the rollup from invoices and payments. Returns rows written.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    inv = MaintenanceInvoice
+    paid = (
+        select(Payment.invoice_id, func.sum(Payment.amount).label("paid"))
+        .group_by(Payment.invoice_id)
+        .subquery()
+    )
+    is_pending = inv.status == "pending"
+    is_overdue = inv.status == "overdue"
+    query = (
+        select(
+            inv.society_id,
+            inv.year,
+            inv.month,
+            func.coalesce(func.sum(paid.c.paid), 0),
+            func.coalesce(func.sum(case((is_pending, inv.total_amount))), 0),
+            func.coalesce(func.sum(case((is_overdue, inv.total_amount))), 0),
+            func.coalesce(func.sum(inv.late_fee), 0),
+            func.count(case((is_pending, inv.id))),
+            func.count(case((is_overdue, inv.id))),
+        )
+        .outerjoin(paid, paid.c.invoice_id == inv.id)
+        .group_by(inv.society_id, inv.year, inv.month)
+    )
+    clear = delete(SocietyMonthlyFinance)
+    if society_id is not None:
+        query = query.where(inv.society_id == society_id)
+        clear = clear.where(SocietyMonthlyFinance.society_id == society_id)
+
+    rows = [
+        dict(zip(("society_id", "year", "month") + ROLLUP_FIELDS, row))
+        for row in db.execute(query)
+    ]
+    db.execute(clear)
+    if rows:
+        db.execute(insert(SocietyMonthlyFinance), rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    db = SessionLocal()
+    try:
+        count = rebuild_society_finance(db, target)
+        db.commit()
+        print(f"[FINANCE] Rebuilt {count} society/month rollup rows")
+    finally:
+        db.close()
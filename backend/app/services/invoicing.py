@@ -0,0 +1,78 @@
+"""Bulk monthly invoice generation for a whole society.
+
+Amounts are computed by the database from each flat's area and type, and
+all invoices are written by a single INSERT ... SELECT. The unique
+(flat_id, year, month) index makes re-running a month a no-op for flats that
+were already billed.
+"""
+from datetime import date
+from sqlalchemy import case, exists, func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.models import Flat, Tower
+from app.models.maintenance import MaintenanceInvoice
+from app.schemas.schemas import RateRule
+from app.services.finance import apply_finance_delta
+
+
+def amount_expression(rule: RateRule):
+    """SQL expression for a flat's amount under ``rule``; NULL means it cannot be priced."""
+    fallback = literal(rule.amount) if rule.amount is not None else None
+    if rule.kind == "flat":
+        if rule.amount is None:
+            raise ValueError("A flat rate needs an amount")
+        return literal(rule.amount)
+    if rule.kind == "per_sqft":
+        if rule.rate_per_sqft is None:
+            raise ValueError("A per-sqft rate needs rate_per_sqft")
+        per_sqft = func.round(Flat.area_sqft * rule.rate_per_sqft, 2)
+        return func.coalesce(per_sqft, fallback) if fallback is not None else per_sqft
+    if not rule.type_rates:
+        raise ValueError("A per-type rate needs type_rates")
+    return case(rule.type_rates, value=Flat.flat_type, else_=fallback)
+
+
+def generate_invoices(db: Session, society_id: int, year: int, month: int, due_date: date, rule: RateRule) -> dict:
+    """Bill every flat of the society for one month; the caller commits."""
+    amount = amount_expression(rule)
+    in_society = Tower.society_id == society_id
+
+    total_flats, priced_flats = db.execute(
+        select(func.count(Flat.id), func.count(amount)).join(Tower, Flat.tower_id == Tower.id).where(in_society)
+    ).one()
+
+    inv = MaintenanceInvoice
+    source = (
+        select(
+            literal(society_id), Flat.id, amount, literal(0.0), amount,
+            literal(due_date), literal(month), literal(year), literal("pending"),
+        )
+        .join(Tower, Flat.tower_id == Tower.id)
+        .where(in_society, amount.is_not(None))
+    )
+    columns = ["society_id", "flat_id", "amount", "late_fee", "total_amount", "due_date", "month", "year", "status"]
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        stmt = dialect_insert(inv).from_select(columns, source).on_conflict_do_nothing(
+            index_elements=["flat_id", "year", "month"],
+        )
+    else:
+        already_billed = exists().where(inv.flat_id == Flat.id, inv.year == year, inv.month == month)
+        stmt = insert(inv).from_select(columns, source.where(~already_billed))
+    created = db.execute(stmt.returning(inv.total_amount)).scalars().all()
+
+    total_amount = round(sum(created), 2)
+    apply_finance_delta(db, society_id, year, month, pending=total_amount, pending_count=len(created))
+    return {
+        "created": len(created),
+        "skipped_existing": priced_flats - len(created),
+        "skipped_unpriced": total_flats - priced_flats,
+        "total_amount": total_amount,
+    }
@@ -0,0 +1,104 @@
+"""Overdue transition and late-fee sweep for maintenance invoices.
+
+Runs periodically inside the API process (see app.main lifespan) and can be
+triggered by hand:
+
+    python -m app.services.late_fees
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from sqlalchemy import and_, func, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models.job import JobRun
+from app.models.maintenance import MaintenanceInvoice
+from app.services.finance import apply_finance_delta
+
+logger = logging.getLogger(__name__)
+
+LATE_FEE_RATE = 0.1  # 10% of the base amount
+SWEEP_JOB_NAME = "late_fee_sweep"
+
+
+def apply_late_fees(db: Session, today: date | None = None, society_id: int | None = None) -> int:
+    """Mark past-due pending invoices overdue and charge the late fee once.
+
+    Covers every society unless ``society_id`` is given; only a full sweep
+    is recorded as the job's last run. Idempotent: a second run on the same
+    day finds nothing to update. Returns the number of invoices moved to
+    overdue. The caller commits.
+    """
+    today = today or date.today()
+    inv = MaintenanceInvoice
+    past_due = and_(inv.status == "pending", inv.due_date < today)
+    if society_id is not None:
+        past_due = and_(past_due, inv.society_id == society_id)
+    fee = inv.amount * LATE_FEE_RATE
+    deltas: dict[tuple, dict] = defaultdict(lambda: defaultdict(float))
+
+    # Charge the fee on rows that have not had one yet
+    charged = db.execute(
+        update(inv)
+        .where(past_due, func.coalesce(inv.late_fee, 0) == 0)
+        .values(late_fee=fee, total_amount=inv.total_amount + fee, updated_at=func.now())
+        .returning(inv.society_id, inv.year, inv.month, inv.late_fee)
+        .execution_options(synchronize_session=False)
+    ).all()
+    for society_id, year, month, late_fee in charged:
+        period = deltas[(society_id, year, month)]
+        period["pending"] += late_fee
+        period["late_fee"] += late_fee
+
+    # Move everything past due to overdue
+    moved = db.execute(
+        update(inv)
+        .where(past_due)
+        .values(status="overdue", updated_at=func.now())
+        .returning(inv.society_id, inv.year, inv.month, inv.total_amount)
+        .execution_options(synchronize_session=False)
+    ).all()
+    for society_id, year, month, total_amount in moved:
+        period = deltas[(society_id, year, month)]
+        period["pending"] -= total_amount
+        period["pending_count"] -= 1
+        period["overdue"] += total_amount
+        period["overdue_count"] += 1
+
+    for (society_id, year, month), period in deltas.items():
+        apply_finance_delta(db, society_id, year, month, **period)
+
+    if society_id is None:
+        db.merge(JobRun(name=SWEEP_JOB_NAME, last_run_at=datetime.now(timezone.utc), last_affected=len(moved)))
+    return len(moved)
+
+
+def run_late_fee_sweep(society_id: int | None = None) -> int:
+    db = SessionLocal()
+    try:
+        count = apply_late_fees(db, society_id=society_id)
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def late_fee_sweeper(interval_seconds: int):
+    """Background loop started from the app lifespan."""
+    while True:
+        try:
+            count = await run_in_threadpool(run_late_fee_sweep)
+            if count:
+                logger.info("Marked %d invoices overdue", count)
+        except Exception:
+            logger.exception("Late fee sweep failed")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    print(f"[LATE FEE] Marked {run_late_fee_sweep()} invoices overdue")
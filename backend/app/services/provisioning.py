@@ -0,0 +1,160 @@
+"""Bulk creation of towers and flats when onboarding a society.
+
+Everything is written with executemany ``insert()`` statements in the
+caller's transaction, so a township of thousands of flats takes a handful of
+round trips instead of one request per flat.
+"""
+import csv
+import io
+import re
+import string
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.models import Flat, Tower
+from app.schemas.schemas import TowerLayout
+
+MAX_FLATS_PER_REQUEST = 20000
+CSV_COLUMNS = ("tower", "flat_number", "floor", "flat_type", "area_sqft")
+NUMBERING_FIELDS = ("tower", "floor", "unit")
+_NUMBERING_SPEC = re.compile(r"(0[1-9]d)?")
+
+
+def _check_numbering(pattern: str) -> None:
+    """Reject numbering patterns other than plain ``{tower}``, ``{floor}`` and
+    ``{unit}`` placeholders, optionally zero-padded (``{unit:02d}``).
+
+    The pattern is admin input passed to ``str.format``; this keeps out
+    attribute and index lookups, conversions and huge widths.
+    """
+    try:
+        fields = list(string.Formatter().parse(pattern))
+    except ValueError as e:
+        raise ValueError(f"invalid numbering pattern ({e})")
+    for _, name, spec, conversion in fields:
+        if name is None:
+            continue  # literal text only
+        if name not in NUMBERING_FIELDS:
+            raise ValueError("invalid numbering pattern: use only {tower}, {floor} and {unit}")
+        if conversion is not None or not _NUMBERING_SPEC.fullmatch(spec):
+            raise ValueError(f"invalid numbering pattern: {{{name}}} allows only zero padding such as {{{name}:02d}}")
+
+
+def flats_from_layouts(layouts: list[TowerLayout]) -> tuple[dict[str, int], list[dict]]:
+    """Expand layout specs into ``({tower: total_floors}, [flat rows keyed by tower name])``."""
+    towers: dict[str, int] = {}
+    flats: list[dict] = []
+    for layout in layouts:
+        if layout.name in towers:
+            raise ValueError(f"Tower '{layout.name}' appears more than once")
+        if len(layout.units) not in (0, 1, layout.units_per_floor):
+            raise ValueError(
+                f"Tower '{layout.name}': units must have 1 or {layout.units_per_floor} entries"
+            )
+        try:
+            _check_numbering(layout.numbering)
+        except ValueError as e:
+            raise ValueError(f"Tower '{layout.name}': {e}")
+        towers[layout.name] = layout.start_floor + layout.floors - 1
+        for floor in range(layout.start_floor, layout.start_floor + layout.floors):
+            for unit in range(1, layout.units_per_floor + 1):
+                spec = layout.units[(unit - 1) % len(layout.units)] if layout.units else None
+                try:
+                    flat_number = layout.numbering.format(tower=layout.name, floor=floor, unit=unit)
+                except (KeyError, IndexError, ValueError) as e:
+                    raise ValueError(f"Tower '{layout.name}': invalid numbering pattern ({e})")
+                flats.append({
+                    "tower": layout.name,
+                    "flat_number": flat_number,
+                    "floor": floor,
+                    "flat_type": spec.flat_type if spec else None,
+                    "area_sqft": spec.area_sqft if spec else None,
+                })
+    return towers, flats
+
+
+def flats_from_csv(content: bytes) -> tuple[dict[str, int], list[dict]]:
+    """Parse a CSV with a header row of ``CSV_COLUMNS``; flat_type and area_sqft may be blank."""
+    try:
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    except UnicodeDecodeError:
+        raise ValueError("CSV must be UTF-8 encoded")
+    missing = {"tower", "flat_number", "floor"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+    towers: dict[str, int] = {}
+    flats: list[dict] = []
+    for line, row in enumerate(reader, start=2):
+        try:
+            tower = row["tower"].strip()
+            flat_number = row["flat_number"].strip()
+            floor = int(row["floor"])
+            area = (row.get("area_sqft") or "").strip()
+            flat = {
+                "tower": tower,
+                "flat_number": flat_number,
+                "floor": floor,
+                "flat_type": (row.get("flat_type") or "").strip() or None,
+                "area_sqft": float(area) if area else None,
+            }
+        except (AttributeError, ValueError):
+            raise ValueError(f"CSV line {line}: invalid row")
+        if not tower or not flat_number:
+            raise ValueError(f"CSV line {line}: tower and flat_number are required")
+        towers[tower] = max(towers.get(tower, 1), floor)
+        flats.append(flat)
+    return towers, flats
+
+
+def provision(db: Session, society_id: int, towers: dict[str, int], flats: list[dict], *, reuse_towers: bool) -> dict:
+    """Insert missing towers and all ``flats``; the caller commits.
+
+    Existing towers of the society are reused when ``reuse_towers`` is set,
+    otherwise a name clash is an error. Flat numbers must be unique per tower,
+    including against flats that already exist.
+    """
+    if not flats:
+        raise ValueError("Nothing to provision")
+    if len(flats) > MAX_FLATS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_FLATS_PER_REQUEST} flats per request")
+
+    tower_ids = dict(db.execute(
+        select(Tower.name, Tower.id).where(Tower.society_id == society_id, Tower.name.in_(towers))
+    ).all())
+    if tower_ids and not reuse_towers:
+        raise ValueError(f"Towers already exist: {', '.join(sorted(tower_ids))}")
+
+    seen = set()
+    if tower_ids:
+        seen.update(db.execute(
+            select(Tower.name, Flat.flat_number).join(Flat, Flat.tower_id == Tower.id)
+            .where(Tower.id.in_(tower_ids.values()))
+        ).all())
+    for flat in flats:
+        key = (flat["tower"], flat["flat_number"])
+        if key in seen:
+            raise ValueError(f"Duplicate flat {flat['flat_number']} in tower '{flat['tower']}'")
+        seen.add(key)
+
+    new_towers = [
+        {"society_id": society_id, "name": name, "total_floors": floors}
+        for name, floors in towers.items() if name not in tower_ids
+    ]
+    for name, tower_id in tower_ids.items():
+        db.execute(
+            update(Tower).where(Tower.id == tower_id, Tower.total_floors < towers[name])
+            .values(total_floors=towers[name])
+        )
+    if new_towers:
+        tower_ids.update(db.execute(insert(Tower).returning(Tower.name, Tower.id), new_towers).all())
+
+    db.execute(insert(Flat), [
+        {
+            "tower_id": tower_ids[flat["tower"]],
+            "flat_number": flat["flat_number"],
+            "floor": flat["floor"],
+            "flat_type": flat["flat_type"],
+            "area_sqft": flat["area_sqft"],
+        }
+        for flat in flats
+    ])
+    return {"towers_created": len(new_towers), "flats_created": len(flats)}
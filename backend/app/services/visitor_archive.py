@@ -0,0 +1,252 @@
+"""Visitor log archival and monthly partition upkeep.
+
+Checked-out and rejected visitors older than ``VISITOR_RETENTION_DAYS`` move
+from ``visitors`` into ``visitor_archive``: gzip'd JSON lines, one chunk per
+society and month, paged back by ``GET /api/visitors/archive``. On PostgreSQL
+the job also creates the partitions of the coming months and drops old ones
+once they are empty, so the hot table and its indexes only hold the
+retention window.
+
+Runs periodically inside the API process (see app.main lifespan) and can be
+triggered by hand:
+
+    python -m app.services.visitor_archive
+"""
+import asyncio
+import gzip
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from itertools import groupby
+import orjson
+from sqlalchemy import delete, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.job import JobRun
+from app.models.visitor import Visitor, VisitorArchiveChunk
+from app.pagination import PageParams, decode_cursor, encode_cursor
+from app.schemas.schemas import VisitorOut
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ARCHIVE_JOB_NAME = "visitor_archive"
+ARCHIVED_STATUSES = ("checked_out", "rejected")
+BATCH_SIZE = 5000
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_LOCK_KEY = 7023  # pg advisory lock; one worker maintains partitions at a time
+MAX_READ_DAYS = 366
+
+
+def retention_cutoff(now: datetime | None = None) -> datetime:
+    """Visitors created before this belong in the archive once they have left."""
+    return (now or datetime.now(timezone.utc)) - timedelta(days=settings.VISITOR_RETENTION_DAYS)
+
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_visitors(db: Session, cutoff: datetime) -> int:
+    """Move up to ``BATCH_SIZE`` departed visitors created before ``cutoff``
+    into the archive. Returns the number moved; the caller commits."""
+    columns = [getattr(Visitor, field) for field in VisitorOut.model_fields]
+    rows = db.execute(
+        select(*columns)
+        .where(Visitor.status.in_(ARCHIVED_STATUSES), Visitor.created_at < cutoff)
+        .order_by(Visitor.created_at)
+        .limit(BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    ).mappings().all()
+    if not rows:
+        return 0
+
+    lines: dict[tuple, list[bytes]] = defaultdict(list)
+    for row in rows:
+        created_at = _utc(row["created_at"])
+        lines[(row["society_id"], created_at.year, created_at.month)].append(
+            orjson.dumps(dict(row), option=orjson.OPT_UTC_Z)
+        )
+    for (society_id, year, month), chunk in lines.items():
+        db.add(VisitorArchiveChunk(
+            society_id=society_id, year=year, month=month,
+            row_count=len(chunk), data=gzip.compress(b"\n".join(chunk)),
+        ))
+    db.execute(
+        # created_at lets PostgreSQL skip the partitions that cannot match
+        delete(Visitor)
+        .where(Visitor.id.in_([row["id"] for row in rows]), Visitor.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    return len(rows)
+
+
+def maintain_partitions(db: Session, cutoff: datetime) -> tuple[int, int]:
+    """Create the partitions of this and the next few months, and drop empty
+    partitions that end before ``cutoff``. PostgreSQL only.
+
+    Returns ``(created, dropped)``; the caller commits.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return 0, 0
+    if db.execute(text("SELECT relkind FROM pg_class WHERE oid = 'visitors'::regclass")).scalar() != "p":
+        return 0, 0  # created without migration 007
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY}).scalar():
+        return 0, 0  # another worker is at it
+    # Attaching and dropping partitions locks the parent table; give up rather than queue behind traffic
+    db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    existing = set(db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'visitors'::regclass"
+    )).scalars())
+
+    def ddl(statement: str) -> bool:
+        try:
+            with db.begin_nested():
+                db.execute(text(statement))
+            return True
+        except DBAPIError as e:
+            logger.warning("Visitor partition maintenance skipped: %s", e.orig)
+            return False
+
+    created = dropped = 0
+    today = datetime.now(timezone.utc).date()
+    this_month = date(today.year, today.month, 1)
+    for offset in range(PARTITION_MONTHS_AHEAD + 1):
+        month = _add_months(this_month, offset)
+        name = f"visitors_{month:%Y_%m}"
+        if name not in existing:
+            # Fails if the default partition already holds rows of that month
+            created += ddl(
+                f"CREATE TABLE {name} PARTITION OF visitors "
+                f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{_add_months(month, 1)} 00:00:00+00')"
+            )
+
+    for name in sorted(existing):
+        try:
+            month = datetime.strptime(name, "visitors_%Y_%m").date()
+        except ValueError:
+            continue  # visitors_default
+        ends = datetime.combine(_add_months(month, 1), time.min, timezone.utc)
+        if ends > cutoff:
+            break
+        # Still-open visits keep their partition until they are checked out and archived
+        if not db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            dropped += ddl(f"DROP TABLE {name}")
+    return created, dropped
+
+
+def run_visitor_archive() -> int:
+    cutoff = retention_cutoff()
+    db = SessionLocal()
+    try:
+        moved = 0
+        while True:
+            batch = archive_visitors(db, cutoff)
+            db.commit()
+            moved += batch
+            if batch < BATCH_SIZE:
+                break
+        maintain_partitions(db, cutoff)
+        db.merge(JobRun(name=ARCHIVE_JOB_NAME, last_run_at=datetime.now(timezone.utc), last_affected=moved))
+        db.commit()
+        return moved
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def visitor_archiver(interval_seconds: int):
+    """Background loop started from the app lifespan."""
+    while True:
+        try:
+            count = await run_in_threadpool(run_visitor_archive)
+            if count:
+                logger.info("Archived %d visitors", count)
+        except Exception:
+            logger.exception("Visitor archive run failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def _created_at(visitor: dict) -> datetime:
+    return _utc(datetime.fromisoformat(visitor["created_at"])).replace(tzinfo=timezone.utc)
+
+
+def read_archive(
+    db: Session,
+    society_id: int,
+    date_from: date,
+    date_to: date,
+    page: PageParams,
+    *,
+    flat_id: int | None = None,
+    status: str | None = None,
+) -> dict:
+    """One page of a society's archived visitors created between the two
+    dates (inclusive), newest first, as ``{"items", "next_cursor"}`` with
+    ``VisitorOut`` dicts.
+
+    Chunks are read newest month first, and reading stops at the first month
+    that fills the page, so only about a month of rows is held at once.
+    """
+    if date_to < date_from:
+        raise ValueError("date_to is before date_from")
+    if (date_to - date_from).days >= MAX_READ_DAYS:
+        raise ValueError(f"Archive ranges are limited to {MAX_READ_DAYS} days")
+    after = decode_cursor(page.cursor, Visitor.created_at) if page.cursor else None
+    newest = after[0] if after and after[0].date() < date_to else date_to
+
+    chunk = VisitorArchiveChunk
+    period = chunk.year * 12 + chunk.month
+    chunks = db.execute(
+        select(chunk.year, chunk.month, chunk.data)
+        .where(
+            chunk.society_id == society_id,
+            period.between(date_from.year * 12 + date_from.month, newest.year * 12 + newest.month),
+        )
+        .order_by(chunk.year.desc(), chunk.month.desc(), chunk.id.desc())
+        .execution_options(yield_per=1)
+    )
+
+    first, last = date_from.isoformat(), date_to.isoformat()
+    visitors = []
+    # A month can span several chunks, one per archive run, so sort per month
+    for _, month_chunks in groupby(chunks, key=lambda row: (row.year, row.month)):
+        month = []
+        for row in month_chunks:
+            for line in gzip.decompress(row.data).splitlines():
+                visitor = orjson.loads(line)
+                if not first <= visitor["created_at"][:10] <= last:
+                    continue
+                if flat_id is not None and visitor["flat_id"] != flat_id:
+                    continue
+                if status is not None and visitor["status"] != status:
+                    continue
+                key = (_created_at(visitor), visitor["id"])
+                if after is not None and key >= after:
+                    continue
+                month.append((key, visitor))
+        month.sort(key=lambda entry: entry[0], reverse=True)
+        visitors.extend(month)
+        if len(visitors) > page.limit:
+            break
+
+    next_cursor = None
+    if len(visitors) > page.limit:
+        visitors = visitors[:page.limit]
+        next_cursor = encode_cursor(*visitors[-1][0])
+    return {"items": [visitor for _, visitor in visitors], "next_cursor": next_cursor}
+
+
+if __name__ == "__main__":
+    print(f"[VISITOR ARCHIVE] Archived {run_visitor_archive()} visitors")
@@ -0,0 +1,183 @@
+"""Who is inside right now: pending and approved visitors, indexed in memory.
+
+The visitor write paths apply each change directly, and every worker also
+applies the visitor events it receives from the event broker, so with the
+``redis`` broker each worker's index follows writes made anywhere. Events
+can arrive late or twice; a visitor's status only moves forward (pending,
+approved, then out), and recently departed visitors are remembered so a
+stale event cannot bring them back. The index is rebuilt from the database
+at startup and whenever the broker reports lost events.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict, defaultdict
+import orjson
+from sqlalchemy import bindparam, select
+from app.database import SessionLocal
+from app.models.flat import Flat
+from app.models.visitor import Visitor
+from app.schemas.schemas import VisitorOut
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "approved")
+_STATUS_ORDER = {"pending": 0, "approved": 1, "checked_out": 2, "rejected": 2}
+MAX_DEPARTED = 10000
+
+_PLATE_SEPARATORS = re.compile(r"[\s\-.]")
+
+
+def normalize_plate(plate: str) -> str:
+    """``ka-05 cd 5678`` and ``KA05CD5678`` are the same vehicle."""
+    return _PLATE_SEPARATORS.sub("", plate).upper()
+
+
+class _Entries:
+    """The lookup tables; replaced wholesale on rebuild."""
+
+    def __init__(self):
+        self.visitors: dict[int, dict] = {}
+        self.by_society: dict[int, set[int]] = defaultdict(set)
+        self.by_flat: dict[int, set[int]] = defaultdict(set)
+        self.by_tower: dict[int, set[int]] = defaultdict(set)
+        self.by_plate: dict[tuple[int, str], set[int]] = defaultdict(set)
+        self.by_pass: dict[str, set[int]] = defaultdict(set)
+
+    def _keys(self, visitor: dict):
+        yield self.by_society, visitor["society_id"]
+        yield self.by_flat, visitor["flat_id"]
+        if visitor.get("tower_id") is not None:
+            yield self.by_tower, visitor["tower_id"]
+        if visitor.get("vehicle_number"):
+            yield self.by_plate, (visitor["society_id"], normalize_plate(visitor["vehicle_number"]))
+        if visitor.get("pass_id"):
+            yield self.by_pass, visitor["pass_id"]
+
+    def add(self, visitor: dict):
+        self.visitors[visitor["id"]] = visitor
+        for table, key in self._keys(visitor):
+            table[key].add(visitor["id"])
+
+    def remove(self, visitor_id: int):
+        visitor = self.visitors.pop(visitor_id, None)
+        if visitor is None:
+            return
+        for table, key in self._keys(visitor):
+            ids = table[key]
+            ids.discard(visitor_id)
+            if not ids:
+                del table[key]
+
+
+class VisitorIndex:
+    def __init__(self):
+        self.ready = False
+        self._entries = _Entries()
+        self._departed: OrderedDict[int, None] = OrderedDict()
+        self._journal: list[dict] | None = None  # changes seen while a rebuild runs
+        self._lock = threading.Lock()
+
+    def apply(self, visitor: dict) -> None:
+        """Record a visitor's current state: ``VisitorOut`` fields plus ``tower_id``."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(visitor)
+            self._apply(self._entries, visitor)
+
+    def _apply(self, entries: _Entries, visitor: dict) -> None:
+        visitor_id = visitor["id"]
+        if visitor_id in self._departed:
+            return
+        current = entries.visitors.get(visitor_id)
+        if current is not None and _STATUS_ORDER.get(visitor["status"], 0) < _STATUS_ORDER.get(current["status"], 0):
+            return
+        entries.remove(visitor_id)
+        if visitor["status"] in ACTIVE_STATUSES:
+            entries.add(visitor)
+        else:
+            self._departed[visitor_id] = None
+            while len(self._departed) > MAX_DEPARTED:
+                self._departed.popitem(last=False)
+
+    def apply_event(self, data: bytes | None) -> None:
+        """Event broker listener; ``None`` means events were missed."""
+        if data is None:
+            threading.Thread(target=self.rebuild, name="visitor-index-rebuild", daemon=True).start()
+            return
+        event = orjson.loads(data)
+        if event.pop("type", "").startswith("visitor."):
+            self.apply(event)
+
+    def rebuild(self) -> None:
+        """Reload pending and approved visitors from the database.
+
+        Changes applied while the query runs are replayed onto the new tables.
+        """
+        with self._lock:
+            if self._journal is not None:
+                return  # already rebuilding
+            self._journal = []
+        try:
+            columns = [getattr(Visitor, field) for field in VisitorOut.model_fields]
+            with SessionLocal() as db:
+                rows = db.execute(
+                    select(*columns, Flat.tower_id)
+                    .join(Flat, Visitor.flat_id == Flat.id)
+                    # Inlined so SQLite matches the ix_visitors_society_active predicate
+                    .where(Visitor.status.in_(
+                        bindparam("active_statuses", ACTIVE_STATUSES, expanding=True, literal_execute=True)
+                    ))
+                ).mappings().all()
+            entries = _Entries()
+            with self._lock:
+                for row in rows:
+                    self._apply(entries, dict(row))
+                for visitor in self._journal:
+                    self._apply(entries, visitor)
+                self._entries = entries
+                self.ready = True
+        except Exception:
+            # Callers fall back to the database while the index is not ready
+            logger.exception("Could not rebuild the visitor index")
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def count(self, society_id: int) -> int:
+        with self._lock:
+            return len(self._entries.by_society.get(society_id, ()))
+
+    def _visitors(self, ids, society_id: int) -> list[dict]:
+        visitors = (self._entries.visitors[visitor_id] for visitor_id in ids)
+        return sorted(
+            (visitor for visitor in visitors if visitor["society_id"] == society_id),
+            key=lambda visitor: visitor["id"],
+        )
+
+    def in_society(self, society_id: int) -> list[dict]:
+        with self._lock:
+            return self._visitors(self._entries.by_society.get(society_id, ()), society_id)
+
+    def in_tower(self, society_id: int, tower_id: int) -> list[dict]:
+        with self._lock:
+            return self._visitors(self._entries.by_tower.get(tower_id, ()), society_id)
+
+    def in_flat(self, society_id: int, flat_id: int) -> list[dict]:
+        with self._lock:
+            return self._visitors(self._entries.by_flat.get(flat_id, ()), society_id)
+
+    def with_vehicle(self, society_id: int, plate: str) -> list[dict]:
+        with self._lock:
+            return self._visitors(self._entries.by_plate.get((society_id, normalize_plate(plate)), ()), society_id)
+
+    def with_pass(self, society_id: int, pass_id: str) -> list[dict]:
+        with self._lock:
+            return self._visitors(self._entries.by_pass.get(pass_id, ()), society_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"ready": self.ready, "visitors": len(self._entries.visitors), "departed": len(self._departed)}
+
+
+visitor_index = VisitorIndex()
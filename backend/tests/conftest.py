@@ -0,0 +1,41 @@
+import contextlib
+import io
+import os
+import tempfile
+import pytest
+
+# Settings are read at import time, so point the app at a throwaway SQLite
+# database before anything from app is imported.
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+os.environ.setdefault("LATE_FEE_SWEEP_INTERVAL_SECONDS", "0")
+os.environ.setdefault("VISITOR_ARCHIVE_INTERVAL_SECONDS", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
+from app.seed import seed  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with contextlib.redirect_stdout(io.StringIO()):
+        seed()
+    with TestClient(app) as client:
+        yield client
+
+
+def _login(client, email: str, password: str) -> dict:
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return _login(client, "admin@nestify.com", "admin123")
+
+
+@pytest.fixture(scope="session")
+def resident_headers(client):
+    return _login(client, "priya@nestify.com", "resident123")
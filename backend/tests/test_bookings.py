@@ -0,0 +1,26 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+PARALLEL_REQUESTS = 150
+
+
+def test_concurrent_bookings_for_one_slot_have_one_winner(client, resident_headers, admin_headers):
+    slot = {
+        "facility_name": "stress_court",
+        "booking_date": "2031-03-14",
+        "start_time": "18:00",
+        "end_time": "19:00",
+    }
+
+    def book(_):
+        return client.post("/api/bookings/", json=slot, headers=resident_headers).status_code
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        statuses = Counter(pool.map(book, range(PARALLEL_REQUESTS)))
+
+    assert statuses == {200: 1, 409: PARALLEL_REQUESTS - 1}
+    stored = client.get(
+        "/api/bookings/", headers=admin_headers,
+        params={"facility": slot["facility_name"], "booking_date": slot["booking_date"]},
+    ).json()["items"]
+    assert [booking["status"] for booking in stored] == ["confirmed"]
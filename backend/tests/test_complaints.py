@@ -0,0 +1,22 @@
+def test_admin_lists_society_complaints(client, admin_headers):
+    response = client.get("/api/complaints/", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    page = response.json()
+    assert page["items"]
+    assert {item["society_id"] for item in page["items"]} == {1}
+    assert all("description_truncated" in item for item in page["items"])
+
+
+def test_resident_lists_only_own_complaints(client, resident_headers):
+    me = client.get("/api/auth/me", headers=resident_headers).json()
+    response = client.get("/api/complaints/", headers=resident_headers)
+    assert response.status_code == 200, response.text
+    items = response.json()["items"]
+    assert items
+    assert {item["user_id"] for item in items} == {me["id"]}
+
+
+def test_list_filters_by_status(client, admin_headers):
+    response = client.get("/api/complaints/", headers=admin_headers, params={"status": "open"})
+    assert response.status_code == 200, response.text
+    assert {item["status"] for item in response.json()["items"]} <= {"open"}
@@ -0,0 +1,131 @@
+"""Exports must stream: peak memory may not grow with the number of rows.
+
+The responses are driven through the ASGI app directly, because TestClient
+buffers the whole body before returning it.
+"""
+import asyncio
+import tempfile
+import tracemalloc
+import zipfile
+from datetime import date
+import pytest
+from sqlalchemy import insert
+from app.auth.jwt import create_access_token, user_claims
+from app.database import SessionLocal
+from app.main import app
+from app.models.flat import Flat
+from app.models.maintenance import MaintenanceInvoice
+from app.models.society import Society
+from app.models.tower import Tower
+from app.models.user import User
+
+FLATS = 100
+SMALL, LARGE = 4000, 20000  # invoices; a multiple of FLATS
+
+
+def _seed_society(name: str, invoices: int) -> str:
+    """A society with ``invoices`` invoices, one per flat and month. Returns
+    a token for its treasurer."""
+    db = SessionLocal()
+    try:
+        society = Society(name=name, address="1 Ledger Lane", city="Pune", state="Maharashtra", pincode="411001")
+        db.add(society)
+        db.flush()
+        tower = Tower(society_id=society.id, name="Tower X", total_floors=10)
+        db.add(tower)
+        db.flush()
+        flats = [Flat(tower_id=tower.id, flat_number=f"X-{i:03}", floor=i // 10) for i in range(FLATS)]
+        treasurer = User(name=f"{name} Treasurer", role="treasurer", society_id=society.id)
+        db.add_all([*flats, treasurer])
+        db.flush()
+        rows = []
+        for index in range(invoices):
+            period, flat = divmod(index, FLATS)
+            rows.append({
+                "society_id": society.id, "flat_id": flats[flat].id, "amount": 2500.0, "late_fee": 0.0,
+                "total_amount": 2500.0, "due_date": date(2000, 1, 10),
+                "month": period % 12 + 1, "year": 2000 + period // 12, "status": "pending",
+            })
+        db.execute(insert(MaintenanceInvoice), rows)
+        db.commit()
+        return create_access_token(user_claims(treasurer))
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def treasurer_tokens(client):
+    """Tokens for two societies of their own, so the bulk invoices stay out
+    of other tests, keyed by invoice count."""
+    return {count: _seed_society(f"Export Towers {count}", count) for count in (SMALL, LARGE)}
+
+
+async def _stream(fmt: str, token: str, sink) -> int:
+    """Send GET /api/maintenance/invoices/export to the app, passing each body
+    chunk to ``sink``. Returns the status code."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/maintenance/invoices/export",
+        "raw_path": b"/api/maintenance/invoices/export", "root_path": "",
+        "query_string": f"format={fmt}".encode(),
+        "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+    status = 0
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            await asyncio.Event().wait()  # the client never disconnects
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            sink(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status
+
+
+def _export(fmt: str, token: str) -> tuple[int, int]:
+    """Stream an export, returning ``(data rows, peak traced bytes)``."""
+    with tempfile.TemporaryFile() as body:
+        newlines = 0
+
+        def sink(chunk: bytes):
+            nonlocal newlines
+            newlines += chunk.count(b"\n")
+            body.write(chunk)
+
+        tracemalloc.start()
+        try:
+            status = asyncio.run(_stream(fmt, token, sink))
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert status == 200
+        if fmt == "csv":
+            return newlines - 1, peak  # minus the header
+        body.seek(0)
+        with zipfile.ZipFile(body) as workbook, workbook.open("xl/worksheets/sheet1.xml") as sheet:
+            rows = 0
+            tail = b""
+            while chunk := sheet.read(1 << 16):
+                rows += (tail + chunk).count(b"<row>")
+                tail = chunk[-4:]
+        return rows - 1, peak
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_export_memory_stays_flat(treasurer_tokens, fmt):
+    small_rows, small_peak = _export(fmt, treasurer_tokens[SMALL])
+    large_rows, large_peak = _export(fmt, treasurer_tokens[LARGE])
+
+    assert (small_rows, large_rows) == (SMALL, LARGE)
+    # Five times the rows; materializing them would need about five times the memory
+    assert large_peak < 2 * small_peak, (small_peak, large_peak)
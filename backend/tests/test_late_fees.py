@@ -0,0 +1,39 @@
+from datetime import date
+from app.database import SessionLocal
+from app.models.flat import Flat
+from app.models.maintenance import MaintenanceInvoice
+from app.models.society import Society
+from app.models.tower import Tower
+
+
+def _past_due_invoice(flat_id: int, society_id: int) -> MaintenanceInvoice:
+    return MaintenanceInvoice(
+        society_id=society_id, flat_id=flat_id, amount=1000.0, late_fee=0.0, total_amount=1000.0,
+        due_date=date(1999, 1, 10), month=1, year=1999, status="pending",
+    )
+
+
+def test_manual_run_only_sweeps_own_society(client, admin_headers):
+    me = client.get("/api/auth/me", headers=admin_headers).json()
+    with SessionLocal() as db:
+        society = Society(name="Other Society", address="2 Side Street", city="Pune", state="Maharashtra", pincode="411002")
+        db.add(society)
+        db.flush()
+        tower = Tower(society_id=society.id, name="Tower O", total_floors=4)
+        db.add(tower)
+        db.flush()
+        flat = Flat(tower_id=tower.id, flat_number="O-101", floor=1)
+        db.add(flat)
+        db.flush()
+        own = _past_due_invoice(me["flat_id"], me["society_id"])
+        other = _past_due_invoice(flat.id, society.id)
+        db.add_all([own, other])
+        db.commit()
+
+        response = client.post("/api/maintenance/late-fees/run", headers=admin_headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["marked_overdue"] >= 1
+
+        db.expire_all()
+        assert (own.status, own.late_fee) == ("overdue", 100.0)
+        assert (other.status, other.late_fee) == ("pending", 0.0)
@@ -0,0 +1,141 @@
+"""Google sign-in against a local mock of Google's OIDC endpoints."""
+import asyncio
+import hashlib
+import time
+from collections import Counter, defaultdict
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from jose.utils import calculate_at_hash
+from app.auth import oauth
+
+ISSUER = "https://accounts.google.com"
+CLIENT_ID = "nestify-test.apps.googleusercontent.com"
+ACCESS_TOKEN = "test-access-token"
+
+
+def _rsa_key() -> tuple[str, dict]:
+    """A private PEM for signing and the matching public JWK."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    ).decode()
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    return private_pem, jwk.construct(public_pem, "RS256").to_dict()
+
+
+_KEYS = {kid: _rsa_key() for kid in ("key-1", "key-2")}
+
+
+class MockGoogle:
+    """Discovery, JWKS and token endpoints; counts the requests to each."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.published = ["key-1"]
+
+    def id_token(self, kid: str = "key-1", **overrides) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": ISSUER, "aud": CLIENT_ID, "sub": "google-123", "email": "asha@example.com",
+            "name": "Asha", "iat": now, "exp": now + 3600,
+            "at_hash": calculate_at_hash(ACCESS_TOKEN, hashlib.sha256),
+        }
+        claims.update(overrides)
+        return jwt.encode(claims, _KEYS[kid][0], algorithm="RS256", headers={"kid": kid})
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests[path] += 1
+        await asyncio.sleep(0.01)  # let concurrent logins pile up
+        if path == "/.well-known/openid-configuration":
+            return httpx.Response(200, headers={"cache-control": "public, max-age=3600"}, json={
+                "issuer": ISSUER,
+                "authorization_endpoint": f"{ISSUER}/o/oauth2/v2/auth",
+                "token_endpoint": f"{ISSUER}/token",
+                "userinfo_endpoint": f"{ISSUER}/userinfo",
+                "jwks_uri": f"{ISSUER}/oauth2/v3/certs",
+            })
+        if path == "/oauth2/v3/certs":
+            keys = [{**_KEYS[kid][1], "kid": kid, "use": "sig", "alg": "RS256"} for kid in self.published]
+            return httpx.Response(200, headers={"cache-control": "public, max-age=3600"}, json={"keys": keys})
+        if path == "/token":
+            return httpx.Response(200, json={
+                "access_token": ACCESS_TOKEN, "id_token": self.id_token(self.published[-1]),
+            })
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def google(monkeypatch):
+    server = MockGoogle()
+    monkeypatch.setattr(oauth, "_client", httpx.AsyncClient(transport=httpx.MockTransport(server.handle)))
+    monkeypatch.setattr(oauth, "_documents", {})
+    monkeypatch.setattr(oauth, "_document_locks", defaultdict(asyncio.Lock))
+    monkeypatch.setattr(oauth.settings, "GOOGLE_ISSUER", ISSUER)
+    monkeypatch.setattr(oauth.settings, "GOOGLE_CLIENT_ID", CLIENT_ID)
+    return server
+
+
+def test_login_verifies_id_token_locally(google):
+    userinfo = asyncio.run(oauth.exchange_google_code("auth-code"))
+    assert userinfo == {"id": "google-123", "email": "asha@example.com", "name": "Asha", "picture": None}
+    assert "/userinfo" not in google.requests
+
+
+@pytest.mark.parametrize("claims", [
+    {"aud": "someone-else.apps.googleusercontent.com"},
+    {"iss": "https://accounts.example.com"},
+    {"iat": int(time.time()) - 7200, "exp": int(time.time()) - 3600},
+], ids=["wrong-aud", "wrong-iss", "expired"])
+def test_rejects_invalid_id_token(google, claims):
+    token = google.id_token(**claims)
+    assert asyncio.run(oauth.verify_google_id_token(token, ACCESS_TOKEN)) is None
+
+
+def test_accepts_bare_issuer(google):
+    token = google.id_token(iss="accounts.google.com")
+    assert asyncio.run(oauth.verify_google_id_token(token, ACCESS_TOKEN))["sub"] == "google-123"
+
+
+def test_key_rotation_refetches_jwks_once(google):
+    async def verify_across_rotation():
+        first = await oauth.verify_google_id_token(google.id_token("key-1"), ACCESS_TOKEN)
+        google.published = ["key-1", "key-2"]
+        second = await oauth.verify_google_id_token(google.id_token("key-2"), ACCESS_TOKEN)
+        again = await oauth.verify_google_id_token(google.id_token("key-2"), ACCESS_TOKEN)
+        return first, second, again
+
+    results = asyncio.run(verify_across_rotation())
+    assert all(claims and claims["sub"] == "google-123" for claims in results)
+    assert google.requests["/oauth2/v3/certs"] == 2
+
+
+def test_concurrent_logins_fetch_documents_once(google):
+    logins = 50
+
+    async def log_in_concurrently():
+        return await asyncio.gather(*(oauth.exchange_google_code(f"code-{i}") for i in range(logins)))
+
+    results = asyncio.run(log_in_concurrently())
+    assert all(userinfo and userinfo["id"] == "google-123" for userinfo in results)
+    assert google.requests == {
+        "/.well-known/openid-configuration": 1,
+        "/oauth2/v3/certs": 1,
+        "/token": logins,
+    }
+
+
+def test_stale_discovery_does_not_block_jwks_refetch(google):
+    async def refetch_with_stale_discovery():
+        jwks = await oauth.get_google_jwks()
+        _, discovery = oauth._documents["discovery"]
+        oauth._documents["discovery"] = (time.monotonic() - 1, discovery)
+        return await asyncio.wait_for(oauth.get_google_jwks(stale=jwks), timeout=5)
+
+    assert asyncio.run(refetch_with_stale_discovery())["keys"]
+    assert google.requests["/.well-known/openid-configuration"] == 2
@@ -0,0 +1,12 @@
+from app.auth.otp import MemoryOTPStore
+
+
+def test_memory_store_keeps_send_counters_when_codes_overflow():
+    store = MemoryOTPStore(max_entries=3)
+    for _ in range(3):
+        store.incr("otp-send:phone:9000000001", 60)
+    for i in range(10):
+        store.set(f"otp:90000000{i:02}", "123456", 60)
+
+    assert store.incr("otp-send:phone:9000000001", 60) == 4
+    assert store.delete_if_equal("otp:9000000009", "123456")
@@ -0,0 +1,31 @@
+import pytest
+
+
+def _provision(client, headers, name: str, numbering: str):
+    society_id = client.get("/api/auth/me", headers=headers).json()["society_id"]
+    return client.post(
+        f"/api/societies/{society_id}/provision", headers=headers,
+        json={"towers": [{"name": name, "floors": 2, "units_per_floor": 2, "numbering": numbering}]},
+    )
+
+
+def test_provisions_flats_from_numbering(client, admin_headers):
+    response = _provision(client, admin_headers, "Tower Numbered", "N-{floor}{unit:02d}")
+    assert response.status_code == 200, response.text
+    assert response.json() == {"towers_created": 1, "flats_created": 4}
+
+
+@pytest.mark.parametrize("numbering", [
+    "{floor:>100000000}",
+    "{floor.__class__}",
+    "{floor[0]}",
+    "{floor!r}",
+    "{0}{unit}",
+    "{floor:{unit}}",
+    "{flat}",
+    "{floor",
+])
+def test_rejects_unsafe_numbering(client, admin_headers, numbering):
+    response = _provision(client, admin_headers, "Tower Rejected", numbering)
+    assert response.status_code == 400, response.text
+    assert "numbering" in response.json()["detail"]
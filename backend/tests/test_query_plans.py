@@ -0,0 +1,136 @@
+"""Every index added since migration 002 must show up in the plan of a query
+the app actually runs, so dropping an index or changing a query so that it
+no longer uses one fails here. Requests and jobs run with a listener that
+collects their SQL, and each statement is run through EXPLAIN QUERY PLAN.
+"""
+import re
+from datetime import date
+import pytest
+from sqlalchemy import event
+from app.database import Base, SessionLocal, engine
+from app.models.maintenance import PERIOD_CONSTRAINT
+from app.schemas.schemas import RateRule
+from app.services.finance import rebuild_society_finance
+from app.services.invoicing import generate_invoices
+from app.services.late_fees import apply_late_fees
+from app.services.visitor_index import visitor_index
+
+_INDEX_IN_PLAN = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+# Index, as SQLite names it in plans -> a query that should use it
+EXPECTED_INDEXES = {
+    "ix_invoices_society_status": "invoice list filtered by status",
+    "ix_invoices_society_period": "finance rollup rebuild",
+    "ix_invoices_society_created": "admin invoice list",
+    "ix_invoices_flat_created": "resident invoice list and dashboard",
+    "ix_invoices_pending_due": "late-fee sweep",
+    "ix_payments_invoice": "admin payment list",
+    "ix_payments_user_date": "resident payment list",
+    "ix_complaints_society_created": "admin complaint list",
+    "ix_complaints_user_created": "resident complaint list",
+    "ix_visitors_society_created": "admin visitor list",
+    "ix_visitors_flat_created": "resident visitor list",
+    "ix_visitors_society_active": "visitor index rebuild",
+    "ix_notices_society_created": "notice list",
+    "ix_bookings_society_facility_date": "booking list and availability",
+    "ix_polls_society_created": "poll list",
+    "ix_votes_poll_user": "poll vote tallies",
+    "ix_users_society_role": "resident list",
+    "ix_visitor_archive_society_period": "visitor archive",
+    # uq_society_monthly_finance_period
+    "sqlite_autoindex_society_monthly_finance_1": "admin dashboard",
+}
+
+ADMIN_READS = [
+    "/api/maintenance/invoices",
+    "/api/maintenance/invoices?status=pending",
+    "/api/maintenance/payments",
+    "/api/complaints/",
+    "/api/visitors/",
+    "/api/visitors/archive?date_from=2026-01-01&date_to=2026-06-30",
+    "/api/notices/",
+    "/api/bookings/?facility=gym",
+    "/api/bookings/availability?facility=gym&from=2026-10-18",
+    "/api/polls/",
+    "/api/residents/",
+    "/api/dashboard/admin",
+]
+RESIDENT_READS = [
+    "/api/maintenance/invoices",
+    "/api/maintenance/payments",
+    "/api/complaints/",
+    "/api/visitors/",
+    "/api/dashboard/resident",
+]
+
+
+def _run_jobs():
+    db = SessionLocal()
+    try:
+        apply_late_fees(db)
+        rebuild_society_finance(db, society_id=1)
+    finally:
+        db.rollback()
+        db.close()
+    visitor_index.rebuild()
+
+
+@pytest.fixture(scope="module")
+def used_indexes(client, admin_headers, resident_headers):
+    statements = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", collect)
+    try:
+        for url in ADMIN_READS:
+            assert client.get(url, headers=admin_headers).status_code == 200, url
+        for url in RESIDENT_READS:
+            assert client.get(url, headers=resident_headers).status_code == 200, url
+        _run_jobs()
+    finally:
+        event.remove(engine, "before_cursor_execute", collect)
+
+    used = set()
+    connection = engine.raw_connection()
+    try:
+        for statement, parameters in statements:
+            if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+                for row in connection.execute("EXPLAIN QUERY PLAN " + statement, parameters):
+                    used.update(_INDEX_IN_PLAN.findall(row[3]))
+    finally:
+        connection.close()
+    return used
+
+
+@pytest.mark.parametrize("index", sorted(EXPECTED_INDEXES))
+def test_index_is_used(used_indexes, index):
+    assert index in used_indexes, f"{index} is not used by the {EXPECTED_INDEXES[index]} query"
+
+
+def test_every_query_index_is_covered():
+    named = {
+        index.name
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+        # Skip the single-column indexes declared with Column(index=True)
+        if not (len(index.columns) == 1 and next(iter(index.columns)).index)
+    }
+    assert named - set(EXPECTED_INDEXES) == {PERIOD_CONSTRAINT}
+
+
+def test_invoice_generation_relies_on_period_constraint(client):
+    # No query plans a lookup on uq_invoices_flat_period; generation uses it
+    # as the ON CONFLICT target, which fails outright without the index.
+    rule = RateRule(kind="flat", amount=1000)
+    db = SessionLocal()
+    try:
+        first = generate_invoices(db, 1, 2031, 1, date(2031, 1, 10), rule)
+        second = generate_invoices(db, 1, 2031, 1, date(2031, 1, 10), rule)
+    finally:
+        db.rollback()
+        db.close()
+    assert first["created"] > 0
+    assert second["created"] == 0
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+from app.database import SessionLocal
+from app.models.visitor import Visitor
+from app.services.visitor_archive import archive_visitors
+
+
+def _archive_first_quarter_of_2020(society_id: int, flat_id: int) -> list[int]:
+    """Archive 30 visitors from January to March 2020 in two runs, with one
+    February visit still open during the first run, so February spans two
+    chunks out of order. Returns their ids, newest first."""
+    start = datetime(2020, 1, 1, 9, tzinfo=timezone.utc)
+    with SessionLocal() as db:
+        visitors = [
+            Visitor(
+                society_id=society_id, flat_id=flat_id, visitor_name=f"Archived guest {i}",
+                status="checked_out", created_at=start + timedelta(days=3 * i),
+            )
+            for i in range(30)
+        ]
+        late_leaver = visitors[11]  # 2020-02-03
+        late_leaver.status = "approved"
+        db.add_all(visitors)
+        db.commit()
+        ids = [visitor.id for visitor in reversed(visitors)]
+
+        archive_visitors(db, datetime(2020, 2, 15, tzinfo=timezone.utc))
+        db.commit()
+        late_leaver.status = "checked_out"
+        db.commit()
+        archive_visitors(db, datetime(2020, 4, 1, tzinfo=timezone.utc))
+        db.commit()
+        return ids
+
+
+def test_archive_pages_newest_first(client, admin_headers):
+    me = client.get("/api/auth/me", headers=admin_headers).json()
+    expected = _archive_first_quarter_of_2020(me["society_id"], me["flat_id"])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"date_from": "2020-01-01", "date_to": "2020-12-31", "limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/visitors/archive", headers=admin_headers, params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= 7
+        seen += [visitor["id"] for visitor in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 5
+
+
+def test_archive_rejects_long_ranges(client, admin_headers):
+    response = client.get(
+        "/api/visitors/archive", headers=admin_headers,
+        params={"date_from": "2020-01-01", "date_to": "2021-06-30"},
+    )
+    assert response.status_code == 400
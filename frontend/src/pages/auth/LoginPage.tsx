@@ -46,7 +46,7 @@ export default function LoginPage() {
             toast.success(`OTP sent! (Dev: ${res.data.otp_dev})`);
             setOtpSent(true);
         } catch (err: any) {
-            toast.error('Failed to send OTP');
+            toast.error(err.response?.data?.detail || 'Failed to send OTP');
         } finally {
             setLoading(false);
         }
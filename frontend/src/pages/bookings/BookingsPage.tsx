@@ -12,7 +12,7 @@ export default function BookingsPage() {
     const [showCreate, setShowCreate] = useState(false);
 
     useEffect(() => { fetchBookings(); }, []);
-    const fetchBookings = () => { api.get('/bookings/').then(r => { setBookings(r.data); setLoading(false); }).catch(() => setLoading(false)); };
+    const fetchBookings = () => { api.get('/bookings/').then(r => { setBookings(r.data.items); setLoading(false); }).catch(() => setLoading(false)); };
 
     const createBooking = async (e: React.FormEvent<HTMLFormElement>) => {
         e.preventDefault();
@@ -3,7 +3,7 @@ import { motion } from 'framer-motion';
 import { useAuth } from '@/store/AuthContext';
 import api from '@/api/client';
 import { toast } from 'sonner';
-import { MessageSquareWarning, Plus, AlertCircle, Clock, CheckCircle2 } from 'lucide-react';
+import { MessageSquareWarning, Plus, AlertCircle, Clock, CheckCircle2, Search } from 'lucide-react';
 
 export default function ComplaintsPage() {
     const { user } = useAuth();
@@ -14,7 +14,16 @@ export default function ComplaintsPage() {
     useEffect(() => { fetchComplaints(); }, []);
 
     const fetchComplaints = () => {
-        api.get('/complaints/').then(r => { setComplaints(r.data); setLoading(false); }).catch(() => setLoading(false));
+        api.get('/complaints/').then(r => { setComplaints(r.data.items); setLoading(false); }).catch(() => setLoading(false));
+    };
+
+    // Ranked full-text search on the server; an empty box goes back to the list
+    const search = (e: React.FormEvent<HTMLFormElement>) => {
+        e.preventDefault();
+        const q = String(new FormData(e.currentTarget).get('q') || '').trim();
+        if (!q) return fetchComplaints();
+        api.get('/complaints/search', { params: { q } }).then(r => setComplaints(r.data.items))
+            .catch((err: any) => toast.error(err.response?.data?.detail || 'Search failed'));
     };
 
     const createComplaint = async (e: React.FormEvent<HTMLFormElement>) => {
@@ -38,6 +47,14 @@ export default function ComplaintsPage() {
         } catch (err: any) { toast.error('Failed to update'); }
     };
 
+    // Lists carry a preview of long descriptions; fetch the rest on demand
+    const readMore = async (id: number) => {
+        try {
+            const r = await api.get(`/complaints/${id}`);
+            setComplaints(cs => cs.map(c => c.id === id ? { ...r.data, description_truncated: false } : c));
+        } catch (err: any) { toast.error(err.response?.data?.detail || 'Failed'); }
+    };
+
     const statusBadge = (s: string) => {
         const map: Record<string, { icon: any; cls: string }> = {
             open: { icon: AlertCircle, cls: 'bg-amber-100 text-amber-700 dark:bg-amber-900/30 dark:text-amber-300' },
@@ -62,6 +79,11 @@ export default function ComplaintsPage() {
                 <button onClick={() => setShowCreate(!showCreate)} className="btn-primary flex items-center gap-2"><Plus className="w-4 h-4" />New Complaint</button>
             </div>
 
+            <form onSubmit={search} className="flex items-center gap-3">
+                <input name="q" type="search" placeholder="Search complaints, e.g. water leakage tower C" className="input-field flex-1" />
+                <button type="submit" className="btn-secondary flex items-center gap-2"><Search className="w-4 h-4" />Search</button>
+            </form>
+
             {showCreate && (
                 <motion.form onSubmit={createComplaint} className="glass-card p-6 space-y-4" initial={{ opacity: 0, height: 0 }} animate={{ opacity: 1, height: 'auto' }}>
                     <input name="title" placeholder="Complaint Title" className="input-field" required />
@@ -82,7 +104,7 @@ export default function ComplaintsPage() {
                         <div className="flex items-start justify-between">
                             <div className="space-y-1">
                                 <h3 className="font-semibold text-surface-900 dark:text-white">{c.title}</h3>
-                                <p className="text-sm text-surface-500 dark:text-gray-400">{c.description}</p>
+                                <p className="text-sm text-surface-500 dark:text-gray-400">{c.description}{c.description_truncated && <>… <button onClick={() => readMore(c.id)} className="text-primary-500 font-medium">Read more</button></>}</p>
                                 <div className="flex items-center gap-3 mt-2">
                                     {statusBadge(c.status)}
                                     <span className={`text-xs font-medium ${priorityColor(c.priority)}`}>● {c.priority}</span>
@@ -14,7 +14,7 @@ export default function MaintenancePage() {
     useEffect(() => { fetchInvoices(); }, []);
 
     const fetchInvoices = () => {
-        api.get('/maintenance/invoices').then(r => { setInvoices(r.data); setLoading(false); }).catch(() => setLoading(false));
+        api.get('/maintenance/invoices').then(r => { setInvoices(r.data.items); setLoading(false); }).catch(() => setLoading(false));
     };
 
     const createInvoice = async (e: React.FormEvent<HTMLFormElement>) => {
@@ -3,7 +3,7 @@ import { motion } from 'framer-motion';
 import { useAuth } from '@/store/AuthContext';
 import api from '@/api/client';
 import { toast } from 'sonner';
-import { Megaphone, Plus, Calendar, Tag } from 'lucide-react';
+import { Megaphone, Plus, Calendar, Tag, Search } from 'lucide-react';
 
 export default function NoticesPage() {
     const { user } = useAuth();
@@ -11,7 +11,7 @@ export default function NoticesPage() {
     const [loading, setLoading] = useState(true);
     const [showCreate, setShowCreate] = useState(false);
 
-    useEffect(() => { api.get('/notices/').then(r => { setNotices(r.data); setLoading(false); }).catch(() => setLoading(false)); }, []);
+    useEffect(() => { api.get('/notices/').then(r => { setNotices(r.data.items); setLoading(false); }).catch(() => setLoading(false)); }, []);
 
     const createNotice = async (e: React.FormEvent<HTMLFormElement>) => {
         e.preventDefault();
@@ -20,7 +20,23 @@ export default function NoticesPage() {
             await api.post('/notices/', { title: fd.get('title'), content: fd.get('content'), category: fd.get('category') || 'general' });
             toast.success('Notice posted');
             setShowCreate(false);
-            api.get('/notices/').then(r => setNotices(r.data));
+            api.get('/notices/').then(r => setNotices(r.data.items));
+        } catch (err: any) { toast.error(err.response?.data?.detail || 'Failed'); }
+    };
+
+    // Ranked full-text search on the server; an empty box goes back to the list
+    const search = (e: React.FormEvent<HTMLFormElement>) => {
+        e.preventDefault();
+        const q = String(new FormData(e.currentTarget).get('q') || '').trim();
+        api.get(q ? '/notices/search' : '/notices/', { params: q ? { q } : {} }).then(r => setNotices(r.data.items))
+            .catch((err: any) => toast.error(err.response?.data?.detail || 'Search failed'));
+    };
+
+    // Lists carry a preview of long notices; fetch the rest on demand
+    const readMore = async (id: number) => {
+        try {
+            const r = await api.get(`/notices/${id}`);
+            setNotices(ns => ns.map(n => n.id === id ? { ...r.data, content_truncated: false } : n));
         } catch (err: any) { toast.error(err.response?.data?.detail || 'Failed'); }
     };
 
@@ -38,6 +54,11 @@ export default function NoticesPage() {
                 {user?.role === 'admin' && <button onClick={() => setShowCreate(!showCreate)} className="btn-primary flex items-center gap-2"><Plus className="w-4 h-4" />Post Notice</button>}
             </div>
 
+            <form onSubmit={search} className="flex items-center gap-3">
+                <input name="q" type="search" placeholder="Search notices" className="input-field flex-1" />
+                <button type="submit" className="btn-secondary flex items-center gap-2"><Search className="w-4 h-4" />Search</button>
+            </form>
+
             {showCreate && (
                 <motion.form onSubmit={createNotice} className="glass-card p-6 space-y-4" initial={{ opacity: 0 }} animate={{ opacity: 1 }}>
                     <input name="title" placeholder="Notice Title" className="input-field" required />
@@ -59,7 +80,7 @@ export default function NoticesPage() {
                             <h3 className="text-lg font-semibold text-surface-900 dark:text-white">{n.title}</h3>
                             <span className={`px-3 py-1 rounded-full text-xs font-medium flex items-center gap-1 ${catColor(n.category)}`}><Tag className="w-3 h-3" />{n.category}</span>
                         </div>
-                        <p className="text-surface-600 dark:text-gray-300 leading-relaxed">{n.content}</p>
+                        <p className="text-surface-600 dark:text-gray-300 leading-relaxed">{n.content}{n.content_truncated && <>… <button onClick={() => readMore(n.id)} className="text-primary-500 text-sm font-medium">Read more</button></>}</p>
                         <div className="flex items-center gap-2 mt-4 text-xs text-surface-400">
                             <Calendar className="w-3.5 h-3.5" />{new Date(n.created_at).toLocaleDateString('en-IN', { dateStyle: 'medium' })}
                         </div>
@@ -8,10 +8,10 @@ export default function ResidentsPage() {
     const [residents, setResidents] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
 
-    useEffect(() => { api.get('/residents/').then(r => { setResidents(r.data); setLoading(false); }).catch(() => setLoading(false)); }, []);
+    useEffect(() => { api.get('/residents/').then(r => { setResidents(r.data.items); setLoading(false); }).catch(() => setLoading(false)); }, []);
 
     const moveOut = async (id: number) => {
-        try { await api.post(`/residents/${id}/move-out`); toast.success('Resident moved out'); api.get('/residents/').then(r => setResidents(r.data)); } catch { toast.error('Failed'); }
+        try { await api.post(`/residents/${id}/move-out`); toast.success('Resident moved out'); api.get('/residents/').then(r => setResidents(r.data.items)); } catch { toast.error('Failed'); }
     };
 
     if (loading) return <div className="space-y-3">{[1, 2, 3].map(i => <div key={i} className="skeleton h-16 rounded-xl" />)}</div>;
@@ -3,36 +3,80 @@ import { motion } from 'framer-motion';
 import { useAuth } from '@/store/AuthContext';
 import api from '@/api/client';
 import { toast } from 'sonner';
-import { ShieldCheck, Plus, UserCheck, LogOut as LogOutIcon, Clock } from 'lucide-react';
+import { ShieldCheck, Plus, UserCheck, LogOut as LogOutIcon, Clock, Ticket, Copy } from 'lucide-react';
 
 export default function VisitorsPage() {
     const { user } = useAuth();
     const [visitors, setVisitors] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
     const [showCreate, setShowCreate] = useState(false);
+    const [showPass, setShowPass] = useState(false);
+    const [issuedPass, setIssuedPass] = useState<any>(null);
+    const isGate = ['admin', 'security'].includes(user?.role || '');
 
     useEffect(() => { fetchVisitors(); }, []);
-    const fetchVisitors = () => { api.get('/visitors/').then(r => { setVisitors(r.data); setLoading(false); }).catch(() => setLoading(false)); };
+    const fetchVisitors = () => { api.get('/visitors/').then(r => { setVisitors(r.data.items); setLoading(false); }).catch(() => setLoading(false)); };
+
+    // Insert or replace a visitor from an API response or a pushed event
+    const applyVisitor = (visitor: any) => setVisitors(vs =>
+        vs.some(v => v.id === visitor.id) ? vs.map(v => v.id === visitor.id ? visitor : v) : [visitor, ...vs]);
+
+    // Arrivals, approvals and checkouts are pushed by the server. EventSource
+    // reconnects on its own; reload on every (re)connect to catch up on
+    // anything missed while disconnected.
+    useEffect(() => {
+        const token = localStorage.getItem('nestify_token') || '';
+        const source = new EventSource(`/api/visitors/events?token=${encodeURIComponent(token)}`);
+        let connected = false;
+        source.onopen = () => { if (connected) fetchVisitors(); connected = true; };
+        source.onmessage = (e) => { const { type, ...visitor } = JSON.parse(e.data); applyVisitor(visitor); };
+        return () => source.close();
+    }, []);
 
     const addVisitor = async (e: React.FormEvent<HTMLFormElement>) => {
         e.preventDefault();
         const fd = new FormData(e.currentTarget);
         try {
-            await api.post('/visitors/', {
+            const r = await api.post('/visitors/', {
                 flat_id: Number(fd.get('flat_id')), visitor_name: fd.get('visitor_name'),
                 visitor_phone: fd.get('visitor_phone'), purpose: fd.get('purpose'), vehicle_number: fd.get('vehicle_number'),
             });
             toast.success('Visitor entry added');
             setShowCreate(false);
-            fetchVisitors();
+            applyVisitor(r.data);
+        } catch (err: any) { toast.error(err.response?.data?.detail || 'Failed'); }
+    };
+
+    // Residents issue signed passes; the gate checks them in with one call
+    const issuePass = async (e: React.FormEvent<HTMLFormElement>) => {
+        e.preventDefault();
+        const fd = new FormData(e.currentTarget);
+        try {
+            const r = await api.post('/visitors/passes', {
+                visitor_name: fd.get('visitor_name'), visitor_phone: fd.get('visitor_phone') || null,
+                purpose: fd.get('purpose') || null, vehicle_number: fd.get('vehicle_number') || null,
+                valid_hours: Number(fd.get('valid_hours')),
+            });
+            setIssuedPass(r.data);
+            setShowPass(false);
+        } catch (err: any) { toast.error(err.response?.data?.detail || 'Failed'); }
+    };
+
+    const verifyPass = async (e: React.FormEvent<HTMLFormElement>) => {
+        e.preventDefault();
+        const form = e.currentTarget;
+        try {
+            applyVisitor((await api.post('/visitors/passes/verify', { code: new FormData(form).get('code') })).data);
+            toast.success('Visitor checked in');
+            form.reset();
         } catch (err: any) { toast.error(err.response?.data?.detail || 'Failed'); }
     };
 
     const approve = async (id: number) => {
-        try { await api.put(`/visitors/${id}/approve`); toast.success('Visitor approved'); fetchVisitors(); } catch { toast.error('Failed'); }
+        try { applyVisitor((await api.put(`/visitors/${id}/approve`)).data); toast.success('Visitor approved'); } catch { toast.error('Failed'); }
     };
     const checkout = async (id: number) => {
-        try { await api.put(`/visitors/${id}/checkout`); toast.success('Visitor checked out'); fetchVisitors(); } catch { toast.error('Failed'); }
+        try { applyVisitor((await api.put(`/visitors/${id}/checkout`)).data); toast.success('Visitor checked out'); } catch { toast.error('Failed'); }
     };
 
     const statusColor = (s: string) => ({ pending: 'bg-amber-100 text-amber-700 dark:bg-amber-900/30 dark:text-amber-300', approved: 'bg-green-100 text-green-700 dark:bg-green-900/30 dark:text-green-300', rejected: 'bg-red-100 text-red-700', checked_out: 'bg-surface-100 text-surface-600 dark:bg-surface-800 dark:text-gray-400' }[s] || '');
@@ -46,11 +90,42 @@ export default function VisitorsPage() {
                     <h2 className="text-2xl font-bold text-surface-900 dark:text-white flex items-center gap-2"><ShieldCheck className="w-6 h-6 text-primary-500" /> Visitor Management</h2>
                     <p className="text-surface-500 dark:text-gray-400 text-sm">Track visitors and approvals</p>
                 </div>
-                {['admin', 'security'].includes(user?.role || '') && (
+                {isGate && (
                     <button onClick={() => setShowCreate(!showCreate)} className="btn-primary flex items-center gap-2"><Plus className="w-4 h-4" />Add Visitor</button>
                 )}
+                {!isGate && user?.flat_id && (
+                    <button onClick={() => setShowPass(!showPass)} className="btn-primary flex items-center gap-2"><Ticket className="w-4 h-4" />Issue Pass</button>
+                )}
             </div>
 
+            {isGate && (
+                <form onSubmit={verifyPass} className="glass-card p-4 flex items-center gap-3">
+                    <input name="code" placeholder="Scan or paste a visitor pass" className="input-field flex-1" required />
+                    <button type="submit" className="btn-primary flex items-center gap-2"><Ticket className="w-4 h-4" />Check In</button>
+                </form>
+            )}
+
+            {showPass && (
+                <motion.form onSubmit={issuePass} className="glass-card p-6 grid grid-cols-1 md:grid-cols-2 gap-4" initial={{ opacity: 0 }} animate={{ opacity: 1 }}>
+                    <input name="visitor_name" placeholder="Visitor Name" className="input-field" required />
+                    <input name="visitor_phone" placeholder="Phone Number" className="input-field" />
+                    <input name="purpose" placeholder="Purpose of Visit" className="input-field" />
+                    <input name="vehicle_number" placeholder="Vehicle Number (optional)" className="input-field" />
+                    <input name="valid_hours" type="number" min={1} defaultValue={24} placeholder="Valid for (hours)" className="input-field" required />
+                    <button type="submit" className="btn-primary">Issue Pass</button>
+                </motion.form>
+            )}
+
+            {issuedPass && (
+                <div className="glass-card p-4 space-y-2">
+                    <p className="font-medium text-surface-900 dark:text-white">Pass for {issuedPass.visitor_name}, valid until {new Date(issuedPass.valid_until).toLocaleString()}</p>
+                    <div className="flex items-center gap-2">
+                        <code className="flex-1 text-xs break-all text-surface-600 dark:text-gray-400">{issuedPass.code}</code>
+                        <button onClick={() => { navigator.clipboard.writeText(issuedPass.code); toast.success('Pass copied'); }} className="btn-secondary text-xs px-3 py-1.5 flex items-center gap-1"><Copy className="w-3.5 h-3.5" />Copy</button>
+                    </div>
+                </div>
+            )}
+
             {showCreate && (
                 <motion.form onSubmit={addVisitor} className="glass-card p-6 grid grid-cols-1 md:grid-cols-2 gap-4" initial={{ opacity: 0 }} animate={{ opacity: 1 }}>
                     <input name="flat_id" type="number" placeholder="Flat ID" className="input-field" required />